@@ -3,30 +3,31 @@ import numpy as np
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 from adafruit_ads1x15.ads1x15 import Mode
-from numpy.fft import fft, fftfreq
-import math
+from sampler import SampleSource, to_volts
+from resample import grid_rate, resample_linear
+from spectrum import SlidingSTFT, PhaseVocoder
+from pitch import make_detector
+from notes import freq_to_note
+from notebank import NoteBank
+from chroma import chroma, match_chord
+from zoom import zoom_peak
+from pipeline import Pipeline
+from ring import SampleRing
 
 # === Configuration (must be first!) ===
 SAMPLES = 512
 RATE    = 860
 GAIN    = 1
-
-# Tolerance and lookup for note mapping
-SEMITONE_TOLERANCE = 0.5
-NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F',
-              'F#', 'G', 'G#', 'A', 'A#', 'B']
-
-def freq_to_note(freq, tol=SEMITONE_TOLERANCE):
-    """Map a frequency (Hz) to the nearest note name within tol semitones, if 100–440 Hz."""
-    if freq <= 0:
-        return None
-    m = 69 + 12 * math.log2(freq / 440.0)      # fractional MIDI note
-    m_round = int(round(m))
-    if abs(m - m_round) <= tol and 100 <= freq <= 440:
-        name = NOTE_NAMES[m_round % 12]
-        octave = (m_round // 12) - 1
-        return f"{name}{octave}"
-    return None
+WINDOW  = "hann"
+PEAK    = "parabolic"  # sub-bin peak estimator: parabolic, jacobsen or quinn (rect only)
+DETECTOR = "fft"     # spectrum pitch picker: fft (largest bin), hps or harmonic_sum
+HOP     = 64         # new samples per display update
+NOTE_BANK = False    # track the notes with Goertzel resonators instead of the STFT
+SHOW_CHORD = False   # line 2 shows the matched chord instead of the frequency
+ZOOM = False         # chirp-Z refine the peak and show cents off the note
+PHASE_VOCODER = False  # refine the peak from the phase advance between frames
+RING_BLOCKS = 16     # captured hops kept while the analyzer is busy
+REPORT  = 10         # seconds between pipeline stats printouts (None = off)
 
 print("A: imports and config done")
 
@@ -61,51 +62,101 @@ print("K: LCD ready!")
 
 # Warm-up read
 _ = chan.value
-sample_interval = 1.0 / RATE
+source = SampleSource(chan, RATE, HOP)
+stft = SlidingSTFT(SAMPLES, HOP, WINDOW)
+detector = make_detector(DETECTOR, window=WINDOW, method=PEAK)
+bank = NoteBank(RATE)
+vocoder = PhaseVocoder(SAMPLES, peaks=1)
+profile = np.zeros(12)
+
+# Hops captured while the analyzer and the LCD are busy wait here
+raw_ring = SampleRing(RING_BLOCKS * HOP, np.int16, mirror=True)
+time_ring = SampleRing(RING_BLOCKS * HOP, float, mirror=True)
 
 print(f"Sampling {SAMPLES} points at {RATE} sps (approx. {SAMPLES / RATE:.2f} seconds window)")
+print(f"Updating every {HOP} samples (approx. {HOP / RATE:.3f} seconds)")
 print("Press Ctrl+C to stop.\n")
 
-print("H: entering while")
-try:
-    while True:
-        # === Collect Samples ===
-        data = []
-        next_sample_time = time.monotonic() + sample_interval
-        for _ in range(SAMPLES):
-            while time.monotonic() < next_sample_time:
-                pass
-            data.append(chan.value)
-            next_sample_time += sample_interval
-
-        # === Convert to volts & zero-center ===
-        voltages = np.array(data) * chan.voltage / chan.value
-        voltages -= voltages.mean()
-
-        # === FFT & find peak ===
-        fft_vals = np.abs(fft(voltages)[:SAMPLES // 2])
-        freqs = fftfreq(SAMPLES, d=1.0 / RATE)[:SAMPLES // 2]
-        peak_idx = int(np.argmax(fft_vals))
-        peak_freq = freqs[peak_idx]
-
-        # === Map frequency to note (or “--” if out of range) ===
-        note = freq_to_note(peak_freq)
-        display = note if note else "--"
-
-        print(f"Detected: {peak_freq:.1f} Hz → {display}")
-
-        # === Update LCD ===
-               # — update LCD —
-        lcd.clear()
-        time.sleep(0.05)               # give the LCD time to process the clear
-        # Line 1: note (or “--” if none)
-        lcd.write_string(display.ljust(16))
-        # Line 2: frequency in Hz
-        lcd.cursor_pos = (1, 0)
+
+# === Sampler stage: keeps capturing while the other stages work ===
+def capture():
+    data = source.capture()
+    time_ring.write(source.timestamps)
+    return raw_ring.write(data)
+
+
+# === Analyzer stage: take in every hop captured so far, analyse the newest ===
+def analyze(_):
+    pushed = False
+    while raw_ring.take(HOP) is not None:
+        start = raw_ring.read - HOP
+        volts = to_volts(raw_ring.window(start, HOP), ads)
+        times = time_ring.window(start, HOP)
+        if NOTE_BANK:
+            # The read times set the time axis, so grid at the nominal rate
+            rate = grid_rate(times, RATE)
+            bank.push(resample_linear(volts, times, rate), rate)
+        else:
+            stft.push(volts, times)
+        pushed = raw_ring.verify(start) or pushed
+    if not pushed:
+        return None
+
+    cents = chord = None
+    if NOTE_BANK:
+        # === Resonators are current after every block ===
+        peak_freq, _ = bank.best()
+    else:
+        if not stft.ready():
+            return None
+
+        # === FFT of the latest SAMPLES & find peak ===
+        stft.run(RATE, resample_linear)
+        peak_freq, _ = detector.from_plan(stft.plan)
+        if ZOOM:
+            peak_freq, _, cents = zoom_peak(stft.plan, peak_freq)
+        elif PHASE_VOCODER:
+            peak_bin = int(round(peak_freq * SAMPLES / stft.plan.rate))
+            if vocoder.update(stft.plan, stft.start, [peak_bin]):
+                peak_freq, cents = vocoder.freqs[0], vocoder.cents[0]
+        if SHOW_CHORD:
+            chord, _ = match_chord(chroma(stft.plan, out=profile))
+    return peak_freq, cents, chord
+
+
+# === Output stage ===
+def output(result):
+    peak_freq, cents, chord = result
+
+    # === Map frequency to note (or “--” if out of range) ===
+    note = freq_to_note(peak_freq)
+    display = note if note else "--"
+
+    print(f"Detected: {peak_freq:.1f} Hz → {display}")
+    if SHOW_CHORD:
+        print(f"Chord: {chord or '--'}")
+
+    # === Update LCD ===
+    # Both lines are padded to 16 chars, so overwrite instead of lcd.clear()
+    lcd.cursor_pos = (0, 0)
+    # Line 1: note (or “--” if none)
+    lcd.write_string(display.ljust(16))
+    # Line 2: frequency in Hz, or the chord
+    lcd.cursor_pos = (1, 0)
+    if SHOW_CHORD:
+        lcd.write_string(f"Chord: {chord or '--'}".ljust(16))
+    elif cents is not None:
+        lcd.write_string(f"{peak_freq:6.2f}Hz {cents:+3.0f}c".ljust(16))
+    else:
         lcd.write_string(f"{peak_freq:5.1f} Hz".ljust(16))
 
 
-        time.sleep(0.2)
+pipeline = Pipeline(capture, analyze, output)
 
+print("H: starting pipeline")
+try:
+    pipeline.run(report_every=REPORT)
 except KeyboardInterrupt:
     print("\nStopped.")
+    print(pipeline.report())
+    print(f"Ring overruns: {raw_ring.overruns}")
@@ -3,17 +3,34 @@ import numpy as np
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 from adafruit_ads1x15.ads1x15 import Mode
-from numpy.fft import fft, fftfreq
-import math
+from sampler import SampleSource, to_volts
+from resample import grid_rate, resample_linear
+from spectrum import SlidingSTFT, SlidingDFT, refine_peaks
+from pitch import make_detector
+from notes import freq_to_note, MIN_FREQ, MAX_FREQ
+from stream import PitchFrame
+from sinks import SinkSet, StdoutSink, LCDSink, NeoPixelSink
+from pipeline import Pipeline
+from ring import SampleRing
 import neopixel_spi
-import colorsys   # <--- for rainbow
 
 # === Configuration (must be first!) ===
 SAMPLES = 512
 RATE = 860
 GAIN = 1
+WINDOW = "hann"
+PEAK = "parabolic"           # sub-bin peak estimator: parabolic, jacobsen or quinn (rect only)
+DETECTOR = "fft"             # spectrum pitch picker: fft (largest bin), hps or harmonic_sum
+HOP = 64                     # new samples per display update
+SLIDING_DFT = False          # keep only the note-range bins current with a sliding DFT
+BLOCK = 16                   # new samples per display update with SLIDING_DFT
 #PIXEL_PIN = board.D18       # GPIO18 (physical 12) is common for Neopixels
 NUM_PIXELS = 144             # Set to however many LEDs are in your strip
+PRINT_RATE = 5               # max console lines per second
+LCD_RATE = 10                # max LCD refreshes per second
+LED_RATE = 30                # max LED strip refreshes per second
+RING_BLOCKS = 16             # captured blocks kept while the analyzer is busy
+REPORT = 10                  # seconds between pipeline stats printouts (None = off)
 
 # WS2812B strip setup
 spi = board.SPI()
@@ -24,22 +41,6 @@ pixels = neopixel_spi.NeoPixel_SPI(
     auto_write=False,
     pixel_order=neopixel_spi.GRB,
 )
-# Tolerance and lookup for note mapping
-SEMITONE_TOLERANCE = 0.5
-NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F',
-              'F#', 'G', 'G#', 'A', 'A#', 'B']
-
-def freq_to_note(freq, tol=SEMITONE_TOLERANCE):
-    """Map a frequency (Hz) to the nearest note name within tol semitones, if 100–440 Hz."""
-    if freq <= 0:
-        return None
-    m = 69 + 12 * math.log2(freq / 440.0)
-    m_round = int(round(m))
-    if abs(m - m_round) <= tol and 100 <= freq <= 440:
-        name = NOTE_NAMES[m_round % 12]
-        octave = (m_round // 12) - 1
-        return f"{name}{octave}"
-    return None
 
 print("A: imports and config done")
 
@@ -74,71 +75,84 @@ print("K: LCD ready!")
 
 # Warm-up read
 _ = chan.value
-sample_interval = 1.0 / RATE
+source = SampleSource(chan, RATE, BLOCK if SLIDING_DFT else HOP)
+stft = SlidingSTFT(SAMPLES, HOP, WINDOW)
+detector = make_detector(DETECTOR, window=WINDOW, method=PEAK)
+# Note-range bins, up to the Nyquist bin at most
+sdft_bins = np.arange(int(MIN_FREQ * SAMPLES / RATE),
+                      min(int(MAX_FREQ * SAMPLES / RATE) + 2, SAMPLES // 2 + 1))
+sdft = SlidingDFT(SAMPLES, sdft_bins, "hann")
+
+# Each output renders the latest frame in its own thread at its own rate
+sinks = SinkSet([
+    StdoutSink(PRINT_RATE),
+    LCDSink(lcd, LCD_RATE),
+    NeoPixelSink(pixels, NUM_PIXELS, LED_RATE),
+]).start()
+
+# Hops captured while the analyzer is busy wait here
+raw_ring = SampleRing(RING_BLOCKS * source.samples, np.int16, mirror=True)
+time_ring = SampleRing(RING_BLOCKS * source.samples, float, mirror=True)
 
 print(f"Sampling {SAMPLES} points at {RATE} sps (approx. {SAMPLES / RATE:.2f} seconds window)")
+print(f"Updating every {HOP} samples (approx. {HOP / RATE:.3f} seconds)")
 print("Press Ctrl+C to stop.\n")
 
-print("H: entering while")
-try:
-    while True:
-        # === Collect Samples ===
-        data = []
-        next_sample_time = time.monotonic() + sample_interval
-        for _ in range(SAMPLES):
-            while time.monotonic() < next_sample_time:
-                pass
-            data.append(chan.value)
-            next_sample_time += sample_interval
-
-        # === Convert to volts & zero-center ===
-        voltages = np.array(data) * chan.voltage / chan.value
-        voltages -= voltages.mean()
-
-        # === FFT & find peak ===
-        fft_vals = np.abs(fft(voltages)[:SAMPLES // 2])
-        freqs = fftfreq(SAMPLES, d=1.0 / RATE)[:SAMPLES // 2]
-        peak_idx = int(np.argmax(fft_vals))
-        peak_freq = freqs[peak_idx]
-
-        # === Map frequency to note (or “--” if out of range) ===
-        note = freq_to_note(peak_freq)
-        display = note if note else "--"
-
-        print(f"Detected: {peak_freq:.1f} Hz → {display}")
-
-        # === Update LCD ===
-        lcd.clear()
-        time.sleep(0.05)
-        lcd.write_string(display.ljust(16))
-        lcd.cursor_pos = (1, 0)
-        lcd.write_string(f"{peak_freq:5.1f} Hz".ljust(16))
-
-        # === Update LEDs based on frequency ===
-        # Map frequency (0–430 Hz) to number of pixels lit
-        if peak_freq < 0:
-            peak_freq = 0
-        if peak_freq > 430:
-            peak_freq = 430
-        fraction = peak_freq / 430
-        num_lit = int(fraction * NUM_PIXELS)
-
-        # Fill LEDs with rainbow
-        for i in range(NUM_PIXELS):
-            hue = i / NUM_PIXELS  # 0 to 1 across strip
-            r, g, b = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
-            color = (int(r*255), int(g*255), int(b*255))
-            if i < num_lit:
-                pixels[i] = color
-            else:
-                pixels[i] = (0, 0, 0)  # off
-
-        pixels.show()
-
-        # Short pause between iterations
-        time.sleep(0.2)
 
+# === Sampler stage: keeps capturing while the analyzer works ===
+def capture():
+    data = source.capture()
+    time_ring.write(source.timestamps)
+    return raw_ring.write(data)
+
+
+# === Analyzer stage: take in every block captured so far, analyse the newest ===
+def analyze(_):
+    block = source.samples
+    pushed = False
+    while raw_ring.take(block) is not None:
+        start = raw_ring.read - block
+        volts = to_volts(raw_ring.window(start, block), ads)
+        times = time_ring.window(start, block)
+        if SLIDING_DFT:
+            # === Slide the note-range bins over the new block ===
+            # The read times set the time axis, so grid at the nominal rate
+            rate = grid_rate(times, RATE)
+            mags = sdft.push(resample_linear(volts, times, rate))
+        else:
+            stft.push(volts, times)
+        if raw_ring.verify(start):
+            pushed = True
+            newest = float(times[-1])
+    if not pushed:
+        return None
+
+    if SLIDING_DFT:
+        peak_idx = int(np.argmax(mags))
+        fine_idx, _ = refine_peaks(sdft.spectrum(), mags, peak_idx, PEAK, "hann")
+        peak_freq = float((sdft_bins[0] + fine_idx) * rate / SAMPLES)
+        confidence = float(mags[peak_idx] ** 2 / np.dot(mags, mags))
+    else:
+        if not stft.ready():
+            return None
+
+        # === FFT of the latest SAMPLES & find peak ===
+        stft.run(RATE, resample_linear)
+        peak_freq, confidence = detector.from_plan(stft.plan)
+        rate = stft.plan.rate
+    return PitchFrame(newest, peak_freq, freq_to_note(peak_freq), confidence, rate)
+
+
+# === Output stage: hand the result to the outputs without waiting for them ===
+pipeline = Pipeline(capture, analyze, sinks.post)
+
+print("H: starting pipeline")
+try:
+    pipeline.run(report_every=REPORT)
 except KeyboardInterrupt:
     print("\nStopped.")
-    pixels.fill((0, 0, 0))
-    pixels.show()
+    print(pipeline.report())
+    print(f"Ring overruns: {raw_ring.overruns}")
+finally:
+    sinks.stop()               # also turns the LEDs off
+    print(sinks.report())
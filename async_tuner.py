@@ -0,0 +1,100 @@
+import asyncio
+import json
+import board
+import busio
+import adafruit_ads1x15.ads1115 as ADS
+from adafruit_ads1x15.analog_in import AnalogIn
+from adafruit_ads1x15.ads1x15 import Mode
+from sampler import SampleSource
+from stream import PitchStream
+
+# === Config ===
+SAMPLES = 512        # FFT window
+HOP = 64             # new samples per frame
+RATE = 860           # Max for ADS1115
+GAIN = 1
+WINDOW = "hann"
+DETECTOR = "fft"     # fft, hps or harmonic_sum
+LCD_INTERVAL = 0.1   # seconds between LCD refreshes
+PRINT_INTERVAL = 0.5 # seconds between console lines
+STATUS_PORT = 8080   # HTTP status page with the latest frame as JSON (None = off)
+
+# === Setup ADC ===
+i2c = busio.I2C(board.SCL, board.SDA)
+ads = ADS.ADS1115(i2c)
+ads.mode = Mode.CONTINUOUS
+ads.data_rate = RATE
+ads.gain = GAIN
+chan = AnalogIn(ads, ADS.P0)
+
+# === Setup LCD ===
+from RPLCD.gpio import CharLCD
+import RPi.GPIO as GPIO
+
+lcd = CharLCD(
+    pin_rs=26,
+    pin_rw=None,
+    pin_e=19,
+    pins_data=[13, 6, 5, 11],
+    numbering_mode=GPIO.BCM,
+    cols=16, rows=2,
+)
+
+# Warm-up read
+_ = chan.value
+source = SampleSource(chan, RATE, HOP)
+
+
+# === Consumers: each takes the newest frame at its own pace ===
+def write_lcd(frame):
+    lcd.cursor_pos = (0, 0)
+    lcd.write_string((frame.note or "--").ljust(16))
+    lcd.cursor_pos = (1, 0)
+    lcd.write_string(f"{frame.freq:5.1f} Hz".ljust(16))
+
+
+async def show_on_lcd(stream):
+    # The GPIO writes block, so they run in a worker thread
+    async for frame in stream.every(LCD_INTERVAL):
+        await asyncio.to_thread(write_lcd, frame)
+
+
+async def print_frames(stream):
+    async for frame in stream.every(PRINT_INTERVAL):
+        print(f"Detected: {frame.freq:.1f} Hz → {frame.note or '--'} "
+              f"({stream.frames} frames, {stream.overruns} overruns)")
+
+
+async def serve_status(stream):
+    async def handle(reader, writer):
+        await reader.readline()
+        frame = stream.latest.value
+        body = json.dumps(frame._asdict() if frame else {}).encode()
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, port=STATUS_PORT)
+    async with server:
+        await server.serve_forever()
+
+
+async def main():
+    stream = PitchStream(source, ads, SAMPLES, window=WINDOW,
+                         detector=DETECTOR).start()
+    consumers = [show_on_lcd(stream), print_frames(stream)]
+    if STATUS_PORT is not None:
+        consumers.append(serve_status(stream))
+    try:
+        await asyncio.gather(*consumers)
+    finally:
+        await stream.stop()
+
+
+print(f"Sampling at {RATE} sps, {SAMPLES}-point window, a frame every {HOP} samples")
+print("Press Ctrl+C to stop.\n")
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    print("\nStopped.")
@@ -0,0 +1,72 @@
+"""Chroma (pitch-class profile) and chord matching from a magnitude spectrum.
+
+Every FFT bin above CHROMA_MIN_FREQ belongs to one of the 12 pitch classes,
+so folding the spectrum is a sparse matrix-vector product; it is stored as a
+bin -> class index table and done with one np.bincount.  The chroma vector
+is then compared with all chord templates in a single matrix product.
+"""
+import numpy as np
+from notes import NOTE_NAMES, freq_to_midi
+
+CHROMA_MIN_FREQ = 60   # Hz, lower bins are too coarse to resolve semitones
+MIN_CHORD_SCORE = 0.8  # cosine similarity needed to report a chord
+
+CHORD_TYPES = {
+    "": (0, 4, 7),         # major
+    "m": (0, 3, 7),        # minor
+    "dim": (0, 3, 6),
+    "aug": (0, 4, 8),
+    "7": (0, 4, 7, 10),
+    "m7": (0, 3, 7, 10),
+}
+
+
+def _chord_templates():
+    names = []
+    rows = []
+    for suffix, intervals in CHORD_TYPES.items():
+        for root in range(12):
+            row = np.zeros(12)
+            row[[(root + i) % 12 for i in intervals]] = 1.0
+            rows.append(row / np.linalg.norm(row))
+            names.append(NOTE_NAMES[root] + suffix)
+    return names, np.array(rows)
+
+
+CHORD_NAMES, CHORD_TEMPLATES = _chord_templates()
+
+def _fold_table(plan):
+    """Bins used for the chroma and the pitch class of each, kept on the FFT plan."""
+    table = plan.tables.get("chroma")
+    if table is None:
+        bins = np.flatnonzero(plan.freqs >= CHROMA_MIN_FREQ)
+        classes = np.round(freq_to_midi(plan.freqs[bins])).astype(int) % 12
+        table = plan.tables["chroma"] = (bins, classes)
+    return table
+
+
+def chroma(plan, out=None):
+    """12-bin pitch-class energy of the spectrum a plan has just computed.
+
+    The result is normalised to unit length (all zeros for silence) and
+    index 0 is C, following NOTE_NAMES.
+    """
+    bins, classes = _fold_table(plan)
+    mags = plan.magnitude[bins]
+    profile = np.bincount(classes, weights=mags * mags, minlength=12)
+    norm = np.linalg.norm(profile)
+    if norm:
+        profile /= norm
+    if out is None:
+        return profile
+    out[:] = profile
+    return out
+
+
+def match_chord(profile):
+    """Best matching chord name and its cosine similarity, or (None, score)."""
+    scores = CHORD_TEMPLATES @ profile
+    best = int(np.argmax(scores))
+    if scores[best] < MIN_CHORD_SCORE:
+        return None, float(scores[best])
+    return CHORD_NAMES[best], float(scores[best])
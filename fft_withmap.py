@@ -3,31 +3,18 @@ import numpy as np
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 from adafruit_ads1x15.ads1x15 import Mode
-from numpy.fft import fft, fftfreq
-import math
+from sampler import SampleSource, to_volts
+from resample import grid_rate, resample_linear
+from pitch import make_detector
+from notes import freq_to_note
 
 # === Configuration (must be first!) ===
 SAMPLES = 512
 RATE    = 860
 GAIN    = 1
-SEMITONE_TOLERANCE = 0.5 
-NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F',
-              'F#', 'G', 'G#', 'A', 'A#', 'B']
-              
-def freq_to_note(freq, tol=SEMITONE_TOLERANCE):
-    """Map a frequency (Hz) to the nearest MIDI note if within tol semitones."""
-    if freq <= 0:
-        return None
-    # MIDI note (float)
-    m = 69 + 12 * math.log2(freq / 440.0)
-    m_round = int(round(m))
-    # How far off in semitones
-    diff = abs(m - m_round)
-    if diff <= tol and 100 <= freq <= 440:
-        name = NOTE_NAMES[m_round % 12]
-        octave = (m_round // 12) - 1
-        return f"{name}{octave}"
-    return None
+WINDOW  = "hann"
+PEAK    = "parabolic"  # sub-bin peak estimator: parabolic, jacobsen or quinn (rect only)
+DETECTOR = "fft"       # pitch detector: fft, hps, harmonic_sum, yin or mcleod
 
 print("A: imports and config done")
 
@@ -71,7 +58,11 @@ print("K: LCD ready!")
 
 # Warm-up read
 _ = chan.value
-sample_interval = 1.0 / RATE
+source = SampleSource(chan, RATE, SAMPLES)
+if DETECTOR in ("yin", "mcleod"):
+    detector = make_detector(DETECTOR)
+else:
+    detector = make_detector(DETECTOR, window=WINDOW, method=PEAK)
 
 print(f"Sampling {SAMPLES} points at {RATE} sps (approx. {SAMPLES / RATE:.2f} seconds window)")
 print("Press Ctrl+C to stop.\n")
@@ -80,29 +71,21 @@ print("H: entering while")
 try:
     while True:
         # — collect samples —
-        data = []
-        next_t = time.monotonic() + sample_interval
-        for _ in range(SAMPLES):
-            while time.monotonic() < next_t:
-                pass
-            data.append(chan.value)
-            next_t += sample_interval
-
-        # — to volts & zero-center —
-        volts = np.array(data) * chan.voltage / chan.value
-        volts -= volts.mean()
-
-        # — FFT & find peak —
-        spectrum = np.abs(fft(volts)[:SAMPLES//2])
-        freqs    = fftfreq(SAMPLES, d=1.0/RATE)[:SAMPLES//2]
-        idx      = int(np.argmax(spectrum))
-        peak_hz  = freqs[idx]
+        data = source.capture()
+
+        # — to volts —
+        volts = to_volts(data, ads)
+        rate = grid_rate(source.timestamps, RATE)
+        volts = resample_linear(volts, source.timestamps, rate)
+
+        # — find pitch —
+        peak_hz, confidence = detector.detect(volts, rate)
 
         # — map to note —
         note = freq_to_note(peak_hz)
         display = note if note else "--"
 
-        print(f"Detected: {peak_hz:.1f} Hz → {display}")
+        print(f"Detected: {peak_hz:.1f} Hz → {display} (confidence {confidence:.2f})")
 
         # — update LCD —
         lcd.clear()
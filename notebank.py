@@ -0,0 +1,105 @@
+"""Bank of leaky Goertzel resonators tuned to the reported notes.
+
+freq_to_note only names notes between MIN_FREQ and MAX_FREQ, about two
+octaves, so instead of a full spectrum per frame this tracks one complex
+resonator per note (plus optional neighbours CENTS either side).  Every
+incoming sample updates each resonator once,
+
+    S_k <- r_k * exp(j w_k) * S_k + x
+
+so the note levels are always current and no window or hop is needed.
+r_k sets an exponential memory whose bandwidth is BANDWIDTH cents around
+each centre, i.e. the same resolution in every octave.  A real input at f
+also drives the resonators at its image rate - f, so only centres at least
+one bandwidth below Nyquist are used (at 860 sps A4 = 440 Hz is dropped).
+"""
+import numpy as np
+from notes import MIN_FREQ, MAX_FREQ, freq_to_midi, midi_to_freq, note_name
+from spectrum import RATE_STEP, resonate
+
+BANDWIDTH = 50         # cents, -3 dB width of each resonator
+DC_ALPHA = 0.05        # per block, smoothing of the removed DC offset
+
+
+def max_note_freq(rate, bandwidth=BANDWIDTH):
+    """Highest usable centre: one bandwidth (in Hz at that centre) below rate / 2."""
+    return rate / 2 / 2 ** (bandwidth / 1200)
+
+
+class NoteBank:
+    """Leaky Goertzel resonators at the note centres between min_freq and max_freq.
+
+    max_freq is clamped to max_note_freq(rate, bandwidth).  push(values,
+    rate) feeds a block of any length (one sample works too); levels then
+    holds the estimated amplitude at every centre in the same units as the
+    input, and best() returns (frequency, confidence).  If tune() lowers the
+    rate, centres above the new limit stay at level 0 (see usable).
+    """
+
+    def __init__(self, rate, cents=0, bandwidth=BANDWIDTH,
+                 min_freq=MIN_FREQ, max_freq=MAX_FREQ):
+        max_freq = min(max_freq, max_note_freq(rate, bandwidth))
+        first = int(np.ceil(freq_to_midi(min_freq)))
+        last = int(np.floor(freq_to_midi(max_freq)))
+        offsets = [0.0] if not cents else [-cents / 100, 0.0, cents / 100]
+        self.midi = np.array([m + o for m in range(first, last + 1) for o in offsets])
+        self.names = [note_name(int(round(m))) for m in self.midi]
+        self.freqs = midi_to_freq(self.midi)
+        self.bandwidth = bandwidth
+
+        self.state = np.zeros(len(self.freqs), dtype=complex)
+        self.levels = np.zeros(len(self.freqs))
+        self._dc = None
+        self.rate = None
+        self.tune(rate)
+
+    def tune(self, rate):
+        """Recompute the resonator coefficients for a new sample rate."""
+        rate = round(rate / RATE_STEP) * RATE_STEP
+        if rate == self.rate:
+            return
+        self.rate = rate
+        self.usable = self.freqs < max_note_freq(rate, self.bandwidth)
+        width = self.freqs * (2 ** (self.bandwidth / 1200) - 1)
+        radius = np.exp(-np.pi * width / rate)
+        self.coeffs = radius * np.exp(2j * np.pi * self.freqs / rate)
+        # A steady sinusoid of amplitude A settles at |S| = A / (2 (1 - r))
+        self.gain = 2 * (1 - radius) * self.usable
+        self._powers = {}
+
+    def push(self, values, rate=None):
+        """Feed a block of samples; return the updated levels array."""
+        if rate is not None:
+            self.tune(rate)
+        values = np.asarray(values, dtype=float)
+        if self._dc is None:
+            self._dc = values.mean()
+        else:
+            self._dc += DC_ALPHA * (values.mean() - self._dc)
+
+        resonate(self.state, self.coeffs, values - self._dc, self._powers)
+
+        np.abs(self.state, out=self.levels)
+        self.levels *= self.gain
+        return self.levels
+
+    def update(self, sample):
+        """Feed a single sample."""
+        return self.push((sample,))
+
+    def best(self):
+        """(centre frequency, confidence) of the strongest resonator.
+
+        Confidence is its share of the bank's total power.
+        """
+        power = self.levels * self.levels
+        total = power.sum()
+        if total == 0:
+            return 0.0, 0.0
+        idx = int(np.argmax(power))
+        return float(self.freqs[idx]), float(power[idx] / total)
+
+    def reset(self):
+        self.state[:] = 0
+        self.levels[:] = 0
+        self._dc = None
@@ -0,0 +1,36 @@
+"""Frequency to note-name mapping shared by the pitch scripts."""
+import math
+import numpy as np
+
+# Tolerance and lookup for note mapping
+SEMITONE_TOLERANCE = 0.5
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F',
+              'F#', 'G', 'G#', 'A', 'A#', 'B']
+MIN_FREQ = 100     # Hz, notes outside this range are not reported
+MAX_FREQ = 440
+
+
+def freq_to_midi(freq):
+    """Fractional MIDI note number of freq (Hz); works on scalars and arrays."""
+    return 69 + 12 * np.log2(np.asarray(freq, dtype=float) / 440.0)
+
+
+def midi_to_freq(m):
+    """Frequency (Hz) of a (fractional) MIDI note number."""
+    return 440.0 * 2 ** ((np.asarray(m, dtype=float) - 69) / 12)
+
+
+def note_name(m):
+    """Name and octave of an integer MIDI note number, e.g. 69 -> 'A4'."""
+    return f"{NOTE_NAMES[m % 12]}{(m // 12) - 1}"
+
+
+def freq_to_note(freq, tol=SEMITONE_TOLERANCE):
+    """Map a frequency (Hz) to the nearest note name within tol semitones, if 100–440 Hz."""
+    if freq <= 0:
+        return None
+    m = 69 + 12 * math.log2(freq / 440.0)      # fractional MIDI note
+    m_round = int(round(m))
+    if abs(m - m_round) <= tol and MIN_FREQ <= freq <= MAX_FREQ:
+        return note_name(m_round)
+    return None
@@ -0,0 +1,147 @@
+"""Sampler, analyzer and output stages running concurrently.
+
+The realtime scripts used to capture, analyse and update the LCD/LEDs one
+after another, so the ADC sat idle while the display was written.  Here each
+step runs in its own thread and hands its results to the next through a
+bounded queue.  The sampler never waits: when the analyzer falls behind the
+oldest queued item is dropped (and counted) so the freshest data always gets
+through.  Most of the blocking work (I2C, GPIO, NumPy) releases the GIL.
+"""
+import queue
+import threading
+import time
+
+QUEUE_DEPTH = 4        # items buffered between two stages
+
+
+class Stage(threading.Thread):
+    """One pipeline step in its own thread.
+
+    work(item) is called for every item taken from inbox (or repeatedly
+    with no argument if there is no inbox, i.e. for the sampler) and its
+    result, unless None, is put on outbox.  processed, dropped and
+    max_depth count the items handled, the items discarded because outbox
+    was full and the deepest the outbox has been.
+    """
+
+    def __init__(self, name, work, inbox=None, outbox=None):
+        super().__init__(name=name, daemon=True)
+        self.work = work
+        self.inbox = inbox
+        self.outbox = outbox
+        self.processed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.busy = 0.0        # seconds spent inside work()
+        self.error = None
+        self._stopping = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopping.is_set():
+                if self.inbox is None:
+                    item = None
+                else:
+                    try:
+                        item = self.inbox.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                start = time.monotonic()
+                result = self.work() if self.inbox is None else self.work(item)
+                self.busy += time.monotonic() - start
+                self.processed += 1
+                if result is not None and self.outbox is not None:
+                    self._put(result)
+        except Exception as exc:
+            self.error = exc
+
+    def _put(self, result):
+        while True:
+            try:
+                self.outbox.put_nowait(result)
+                break
+            except queue.Full:
+                # Make room by discarding the stalest item
+                try:
+                    self.outbox.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.max_depth = max(self.max_depth, self.outbox.qsize())
+
+    @property
+    def depth(self):
+        """Items currently waiting in the outbox."""
+        return 0 if self.outbox is None else self.outbox.qsize()
+
+    def stop(self):
+        self._stopping.set()
+
+
+class Pipeline:
+    """capture() -> analyze(block) -> output(result), each in its own thread.
+
+    capture must return data the next capture() will not overwrite (copy or
+    hand out a view of a ring buffer).  run() blocks until Ctrl+C or until a
+    stage fails, whose exception it then re-raises.
+    """
+
+    def __init__(self, capture, analyze, output, depth=QUEUE_DEPTH):
+        samples = queue.Queue(depth)
+        results = queue.Queue(depth)
+        self.stages = [
+            Stage("sampler", capture, outbox=samples),
+            Stage("analyzer", analyze, inbox=samples, outbox=results),
+            Stage("output", output, inbox=results),
+        ]
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for stage in self.stages:
+            stage.join()
+
+    def check(self):
+        """Re-raise the first error raised in a stage, if any."""
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def run(self, report_every=None):
+        """Start the stages and wait; print stats() every report_every seconds."""
+        self.start()
+        last_report = time.monotonic()
+        try:
+            while True:
+                time.sleep(0.1)
+                self.check()
+                if report_every and time.monotonic() - last_report >= report_every:
+                    print(self.report())
+                    last_report = time.monotonic()
+        finally:
+            self.stop()
+
+    def stats(self):
+        """Per-stage counters, keyed by stage name."""
+        return {
+            stage.name: {
+                "processed": stage.processed,
+                "dropped": stage.dropped,
+                "depth": stage.depth,
+                "max_depth": stage.max_depth,
+                "busy": stage.busy,
+            }
+            for stage in self.stages
+        }
+
+    def report(self):
+        """One-line summary of stats()."""
+        return "  ".join(
+            f"{name}: {s['processed']} done, {s['dropped']} dropped, "
+            f"queue {s['depth']}/{s['max_depth']}"
+            for name, s in self.stats().items()
+        )
@@ -0,0 +1,330 @@
+"""Pluggable pitch detectors for the realtime scripts.
+
+Every detector takes one frame of zero-centred or raw samples and the sample
+rate and returns (frequency in Hz, confidence in 0..1); (0.0, 0.0) means no
+pitch was found.  "fft" is the existing largest-FFT-bin logic; "hps" and
+"harmonic_sum" score every candidate fundamental from the same magnitude
+spectrum so a strong second or third harmonic does not win the octave.
+"yin" and "mcleod" work in the time domain, need only a couple of periods
+of signal and lock onto the fundamental rather than its strongest harmonic.
+They upsample the frame (8x by default) so short periods get a usable lag
+grid.
+"""
+import numpy as np
+from notes import MIN_FREQ, MAX_FREQ
+from spectrum import plan_for
+
+HARMONICS = 4          # partials scored per candidate fundamental
+HARMONIC_DECAY = 0.8   # harmonic sum: weight of partial h is DECAY ** (h - 1)
+OCTAVE_RATIO = 0.3     # HPS: prefer the lower octave if it scores this well
+
+
+def _lag_range(rate, min_freq, max_freq, length):
+    """Smallest and largest lag (samples) to search for the given pitch range."""
+    min_lag = max(1, int(rate / max_freq))
+    max_lag = min(int(np.ceil(rate / min_freq)) + 1, length // 2)
+    return min_lag, max_lag
+
+
+def _parabolic(values, i):
+    """Offset of the vertex of the parabola through values[i-1:i+2]."""
+    if i <= 0 or i >= len(values) - 1:
+        return 0.0
+    a, b, c = values[i - 1], values[i], values[i + 1]
+    denom = a - 2 * b + c
+    if denom == 0:
+        return 0.0
+    return 0.5 * (a - c) / denom
+
+
+def _prepare(samples, rate, upsample):
+    """Zero-centre a frame and band-limit upsample it by an integer factor.
+
+    At 860 sps a 400 Hz period is only ~2 samples long, far too coarse for
+    lag-domain methods; FFT zero padding gives them a finer lag grid.
+    """
+    x = np.asarray(samples, dtype=float)
+    x = x - x.mean()
+    if upsample > 1:
+        count = len(x)
+        x = np.fft.irfft(np.fft.rfft(x), count * upsample) * upsample
+        rate = rate * upsample
+    return x, rate
+
+
+def _harmonic_table(plan, harmonics, min_freq, max_freq):
+    """Candidate bins and the bins of their partials for one FFT plan.
+
+    Returns (candidates, index, valid): index[h - 1, :, i] are the bins
+    around partial h of candidates[i] (an off-bin fundamental puts partial h
+    up to h/2 bins away, so the overtones are looked for one bin either
+    side), valid marks the ones to use.  Built once per plan and range and
+    kept in plan.tables, so it goes when the plan leaves the plan cache.
+    """
+    key = ("harmonics", harmonics, min_freq, max_freq)
+    table = plan.tables.get(key)
+    if table is None:
+        step = plan.rate / plan.samples
+        last = len(plan.freqs) - 1
+        first_bin = max(1, int(np.ceil(min_freq / step)))
+        last_bin = min(last, int(max_freq / step))
+        candidates = np.arange(first_bin, last_bin + 1)
+        orders = np.arange(1, harmonics + 1)[:, None, None]
+        index = orders * candidates + np.array([-1, 0, 1])[:, None]
+        valid = (index <= last) & ((orders > 1) | (index == candidates))
+        table = plan.tables[key] = (candidates, np.minimum(index, last), valid)
+    return table
+
+
+def _autocorrelation(x, head, max_lag):
+    """r[tau] = sum(x[j] * x[j + tau] for j < head) for tau <= max_lag, via FFT."""
+    size = 1 << int(np.ceil(np.log2(len(x) + head)))
+    spec = np.fft.rfft(x, size) * np.conj(np.fft.rfft(x[:head], size))
+    return np.fft.irfft(spec, size)[:max_lag + 1]
+
+
+class PitchDetector:
+    """Base class: detect(samples, rate) -> (frequency, confidence)."""
+
+    def __init__(self, min_freq=MIN_FREQ, max_freq=MAX_FREQ):
+        self.min_freq = min_freq
+        self.max_freq = max_freq
+
+    def detect(self, samples, rate):
+        raise NotImplementedError("Subclass must implement detect.")
+
+
+class FFTPeakDetector(PitchDetector):
+    """Largest FFT bin, refined to sub-bin accuracy.
+
+    Confidence is the share of the spectrum's power in the peak bins.
+    """
+
+    def __init__(self, window="hann", method="parabolic", **kwargs):
+        if method == "quinn" and window != "rect":
+            raise ValueError("Quinn's estimator needs the rect window, not {}".format(window))
+        super().__init__(**kwargs)
+        self.window = window
+        self.method = method
+
+    def detect(self, samples, rate):
+        plan = plan_for(len(samples), rate, self.window)
+        plan.run(samples)
+        return self.from_plan(plan)
+
+    def from_plan(self, plan):
+        """Pitch of the spectrum a plan has just computed with run()."""
+        peak, confidence = self.pick(plan)
+        if confidence == 0:
+            return 0.0, 0.0
+        freq, _ = plan.refine(peak, self.method)
+        return float(freq), float(confidence)
+
+    def _local_peak(self, plan, k):
+        """Largest magnitude bin next to k, for the sub-bin refinement."""
+        lo = max(k - 1, 0)
+        return lo + int(np.argmax(plan.magnitude[lo:k + 2]))
+
+    def pick(self, plan):
+        """Bin of the pitch and the confidence in it."""
+        magnitude = plan.magnitude
+        peak = int(np.argmax(magnitude))
+        power = magnitude * magnitude
+        total = power.sum()
+        if total == 0:
+            return peak, 0.0
+        return peak, power[max(peak - 1, 0):peak + 2].sum() / total
+
+
+class HarmonicSumDetector(FFTPeakDetector):
+    """Weighted harmonic sum: candidate f scores sum(DECAY^(h-1) mag(h f)).
+
+    Partials above Nyquist simply add nothing, so a lone strong partial
+    scores less than the fundamental it belongs to.  Confidence is the
+    winning score's share of all candidate scores.
+    """
+
+    def __init__(self, harmonics=HARMONICS, **kwargs):
+        super().__init__(**kwargs)
+        self.harmonics = harmonics
+        self.weights = HARMONIC_DECAY ** np.arange(harmonics)[:, None]
+
+    def scores(self, plan):
+        candidates, index, valid = _harmonic_table(plan, self.harmonics,
+                                                   self.min_freq, self.max_freq)
+        partials = (plan.magnitude[index] * valid).max(axis=1)
+        return candidates, (partials * self.weights).sum(axis=0)
+
+    def pick(self, plan):
+        candidates, scores = self.scores(plan)
+        total = scores.sum()
+        if not len(scores) or total == 0:
+            return 0, 0.0
+        best = int(np.argmax(scores))
+        return self._local_peak(plan, int(candidates[best])), scores[best] / total
+
+
+class HPSDetector(HarmonicSumDetector):
+    """Harmonic product spectrum over the partials below Nyquist.
+
+    Scores are geometric means of the partials (computed as a mean of logs),
+    and only candidates with at least two partials below Nyquist are scored:
+    with the fundamental alone there is nothing to compare, and a high
+    candidate would beat every real fundamental whose top partial is weak.
+    The usual HPS octave check then moves to the candidate an octave down if
+    it scores at least OCTAVE_RATIO of the winner.  A spectral peak too high
+    to have a second partial (above rate/4) is only reported if it is not a
+    harmonic of a candidate scoring at least OCTAVE_RATIO of its magnitude.
+    """
+
+    def scores(self, plan):
+        candidates, index, valid = _harmonic_table(plan, self.harmonics,
+                                                   self.min_freq, self.max_freq)
+        partials = (plan.magnitude[index] * valid).max(axis=1)
+        present = valid.any(axis=1)
+        count = present.sum(axis=0)
+        logs = np.log(partials + np.finfo(float).tiny) * present
+        scores = np.exp(logs.sum(axis=0) / count)
+        scores[count < 2] = 0.0
+        return candidates, scores
+
+    def pick(self, plan):
+        peak, confidence = FFTPeakDetector.pick(self, plan)
+        if confidence == 0:
+            return 0, 0.0
+        candidates, scores = self.scores(plan)
+        total = scores.sum()
+        best = int(np.argmax(scores)) if total > 0 else None
+        if best is not None:
+            lower = int(np.searchsorted(candidates, int(round(candidates[best] / 2))))
+            if lower < best and candidates[lower] * 2 - candidates[best] in (-1, 0, 1):
+                # The lower octave may span two bins; take the better one
+                if lower + 1 < best and scores[lower + 1] > scores[lower]:
+                    lower += 1
+                if scores[lower] >= OCTAVE_RATIO * scores[best]:
+                    best = lower
+
+        # A peak with no second partial in band cannot be scored by HPS
+        magnitude = plan.magnitude
+        if (2 * peak - 1 >= len(magnitude) and len(candidates)
+                and candidates[0] <= peak <= candidates[-1] + 1):
+            if best is None or scores[best] < OCTAVE_RATIO * magnitude[peak]:
+                return peak, confidence
+            fundamental = int(candidates[best])
+            order = int(round(peak / fundamental))
+            if order < 2 or abs(peak - order * fundamental) > 1:
+                return peak, confidence
+        if best is None:
+            return 0, 0.0
+        return self._local_peak(plan, int(candidates[best])), scores[best] / total
+
+
+class YINDetector(PitchDetector):
+    """YIN: first dip of the cumulative mean normalised difference below THRESHOLD.
+
+    The difference function is built from an FFT autocorrelation and running
+    energy sums, so the whole lag range is computed in a few array ops.
+    Confidence is 1 - the normalised difference at the chosen lag.
+    """
+
+    def __init__(self, threshold=0.15, upsample=8, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.upsample = upsample
+
+    def difference(self, x, max_lag):
+        """Cumulative mean normalised difference d'(tau) for tau <= max_lag."""
+        head = len(x) - max_lag
+        energy = np.concatenate(([0.0], np.cumsum(x * x)))
+        lags = np.arange(max_lag + 1)
+        # d(tau) = sum over the window of (x[j] - x[j + tau])^2
+        diff = (energy[head] + energy[head + lags] - energy[lags]
+                - 2 * _autocorrelation(x, head, max_lag))
+        cmnd = np.ones(max_lag + 1)
+        running = np.cumsum(diff[1:])
+        running[running == 0] = 1.0
+        cmnd[1:] = diff[1:] * lags[1:] / running
+        return cmnd
+
+    def detect(self, samples, rate):
+        x, rate = _prepare(samples, rate, self.upsample)
+        min_lag, max_lag = _lag_range(rate, self.min_freq, self.max_freq, len(x))
+        if max_lag <= min_lag:
+            return 0.0, 0.0
+        cmnd = self.difference(x, max_lag)
+
+        below = np.flatnonzero(cmnd[min_lag:max_lag] < self.threshold)
+        if len(below):
+            lag = min_lag + below[0]
+            # Walk down to the bottom of this dip
+            while lag + 1 < max_lag and cmnd[lag + 1] < cmnd[lag]:
+                lag += 1
+        else:
+            lag = min_lag + int(np.argmin(cmnd[min_lag:max_lag]))
+        period = lag + _parabolic(cmnd, lag)
+        confidence = max(0.0, 1.0 - cmnd[lag])
+        return float(rate / period), float(confidence)
+
+
+class McLeodDetector(PitchDetector):
+    """McLeod pitch method: key maxima of the normalised square difference function.
+
+    The first key maximum within CUTOFF of the highest one gives the period;
+    its NSDF value (the clarity) is the confidence.
+    """
+
+    def __init__(self, cutoff=0.9, upsample=8, **kwargs):
+        super().__init__(**kwargs)
+        self.cutoff = cutoff
+        self.upsample = upsample
+
+    def nsdf(self, x, max_lag):
+        """Normalised square difference n'(tau) for tau <= max_lag."""
+        count = len(x)
+        energy = np.concatenate(([0.0], np.cumsum(x * x)))
+        lags = np.arange(max_lag + 1)
+        # m(tau) = sum(x[j]^2 + x[j + tau]^2) over the overlapping part
+        m = energy[count - lags] + energy[count] - energy[lags]
+        m[m == 0] = 1.0
+        return 2 * _autocorrelation(x, count, max_lag) / m
+
+    def detect(self, samples, rate):
+        x, rate = _prepare(samples, rate, self.upsample)
+        min_lag, max_lag = _lag_range(rate, self.min_freq, self.max_freq, len(x))
+        if max_lag <= min_lag:
+            return 0.0, 0.0
+        nsdf = self.nsdf(x, max_lag)
+
+        # Positive lobes after the first negative-going zero crossing
+        rising = np.concatenate(([False], (nsdf[:-1] <= 0) & (nsdf[1:] > 0)))
+        lobe = np.cumsum(rising)
+        lobe[:min_lag] = 0
+        candidates = np.flatnonzero((nsdf > 0) & (lobe > 0))
+        if not len(candidates):
+            return 0.0, 0.0
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(lobe[candidates])) + 1))
+        key_max = np.maximum.reduceat(nsdf[candidates], starts)
+
+        chosen = int(np.flatnonzero(key_max >= self.cutoff * key_max.max())[0])
+        end = starts[chosen + 1] if chosen + 1 < len(starts) else len(candidates)
+        segment = candidates[starts[chosen]:end]
+        lag = int(segment[np.argmax(nsdf[segment])])
+        period = lag + _parabolic(nsdf, lag)
+        return float(rate / period), float(min(1.0, nsdf[lag]))
+
+
+DETECTORS = {
+    "fft": FFTPeakDetector,
+    "hps": HPSDetector,
+    "harmonic_sum": HarmonicSumDetector,
+    "yin": YINDetector,
+    "mcleod": McLeodDetector,
+}
+
+
+def make_detector(name, **kwargs):
+    """Create the pitch detector registered under name."""
+    try:
+        return DETECTORS[name](**kwargs)
+    except KeyError:
+        raise ValueError("Unknown pitch detector: {}".format(name)) from None
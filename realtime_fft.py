@@ -2,17 +2,22 @@ import time
 import board
 import busio
 import numpy as np
-from scipy.fft import fft
 import matplotlib.pyplot as plt
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 from adafruit_ads1x15.ads1x15 import Mode
+from sampler import SampleSource, to_volts, ReadySampleSource, GPIOEdgeSource
+from resample import grid_rate, resample_linear
+from spectrum import plan_for
 
 # === Config ===
 SAMPLES = 512        # Must be power of 2 for FFT
 RATE = 860           # Max for ADS1115
 GAIN = 1             # Gain for ADS1115 (adjust if needed)
 PLOT = False         # Set to True to visualize the spectrum
+WINDOW = "hann"      # FFT window: rect, hann, hamming or blackman
+PEAK = "parabolic"   # Sub-bin peak estimator: parabolic, jacobsen or quinn (rect only)
+ALERT_PIN = None     # BCM pin wired to ALERT/RDY, or None to pace reads on a timer
 
 # === Setup ADC ===
 i2c = busio.I2C(board.SCL, board.SDA)
@@ -24,7 +29,11 @@ chan = AnalogIn(ads, ADS.P0)
 
 # Warm-up read
 _ = chan.value
-sample_interval = 1.0 / RATE
+if ALERT_PIN is None:
+    source = SampleSource(chan, RATE, SAMPLES)
+else:
+    ads.enable_conversion_ready()
+    source = ReadySampleSource(chan, RATE, SAMPLES, GPIOEdgeSource(ALERT_PIN))
 
 print(f"Sampling {SAMPLES} points at {RATE} sps (approx. {SAMPLES/RATE:.2f} seconds window)")
 print("Press Ctrl+C to stop.\n")
@@ -32,30 +41,23 @@ print("Press Ctrl+C to stop.\n")
 try:
     while True:
         # === Collect Samples ===
-        data = []
-        next_sample_time = time.monotonic() + sample_interval
-        for _ in range(SAMPLES):
-            while time.monotonic() < next_sample_time:
-                pass
-            val = chan.value
-            data.append(val)
-            next_sample_time += sample_interval
+        data = source.capture()
 
         # === Convert to volts (optional) ===
-        voltages = [v * chan.voltage / chan.value for v in data]
+        voltages = to_volts(data, ads)
 
-        # === Preprocess ===
-        samples = np.array(voltages)
-        samples -= np.mean(samples)  # Zero-center
+        # === Preprocess: the read times set the time axis ===
+        rate = grid_rate(source.timestamps, RATE)
+        samples = resample_linear(voltages, source.timestamps, rate)
 
-        # === FFT ===
-        fft_vals = fft(samples)
-        fft_vals = np.abs(fft_vals[:SAMPLES // 2])
-        freqs = np.fft.fftfreq(SAMPLES, d=1.0 / RATE)[:SAMPLES // 2]
+        # === FFT (zero-centered and windowed by the plan) ===
+        plan = plan_for(SAMPLES, rate, WINDOW)
+        fft_vals = plan.run(samples)
+        freqs = plan.freqs
 
         # === Peak Frequency ===
         peak_idx = np.argmax(fft_vals)
-        peak_freq = freqs[peak_idx]
+        peak_freq = float(plan.refine(peak_idx, PEAK)[0])
         print(f"Peak frequency: {peak_freq:.2f} Hz")
 
         # === Optional: Plot FFT ===
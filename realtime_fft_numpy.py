@@ -1,15 +1,25 @@
 import time, board, busio 
+import multiprocessing
 import numpy as np
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 from adafruit_ads1x15.ads1x15 import Mode
-from numpy.fft import fft, fftfreq
+from sampler import SampleSource, to_volts
+from resample import grid_rate, resample_linear
+from spectrum import plan_for
+from pipeline import Pipeline, QUEUE_DEPTH
+from ring import SampleRing
+from shmring import SharedFrames, run_sampler
 
 
 # === Configuration (must be first!) ===
 SAMPLES = 512
 RATE    = 860
 GAIN    = 1
+WINDOW  = "hann"
+PEAK    = "parabolic"  # sub-bin peak estimator: parabolic, jacobsen or quinn (rect only)
+REPORT  = 10           # seconds between pipeline stats printouts (None = off)
+SPLIT_PROCESS = False  # sample in a separate process, sharing the ring via sysv_ipc
 
 print("A: imports and config done")
 
@@ -53,72 +63,85 @@ print("K: LCD ready!")
 
 # Warm-up read
 _ = chan.value
-sample_interval = 1.0 / RATE
+source = SampleSource(chan, RATE, SAMPLES)
+
+# Room for every block that can wait in the sampler -> analyzer queue
+if SPLIT_PROCESS:
+    frames = SharedFrames((QUEUE_DEPTH + 2) * SAMPLES)
+    raw_ring, time_ring = frames.raw, frames.times
+    sampler = multiprocessing.Process(target=run_sampler, args=(frames, source))
+else:
+    raw_ring = SampleRing((QUEUE_DEPTH + 2) * SAMPLES, np.int16, mirror=True)
+    time_ring = SampleRing((QUEUE_DEPTH + 2) * SAMPLES, float, mirror=True)
+voltages = np.zeros(SAMPLES)
 
 print(f"Sampling {SAMPLES} points at {RATE} sps (approx. {SAMPLES / RATE:.2f} seconds window)")
 print("Press Ctrl+C to stop.\n")
 
-print("H: entering while")
-try:
-    while True:
-        # === Collect Samples ===
-        data = []
-        next_sample_time = time.monotonic() + sample_interval
-        for _ in range(SAMPLES):
-            # Wait until it's time for the next sample
-            while time.monotonic() < next_sample_time:
-                pass
-            val = chan.value
-            data.append(val)
-            next_sample_time += sample_interval
-
-        # === Convert raw data to voltage (optional conversion) ===
-        # Here, we use the relation: raw_value * (chan.voltage / chan.value)
-        # This scaling assumes linearity across the ADC range.
-        voltages = [v * chan.voltage / chan.value for v in data]
-
-        # === Preprocess: Zero-center the signal ===
-        samples = np.array(voltages)
-        samples -= np.mean(samples)
-
-        # === Compute FFT using NumPy ===
-        fft_vals = fft(samples)
-        fft_vals = np.abs(fft_vals[:SAMPLES // 2])  # Single-sided FFT (magnitude)
-        freqs = fftfreq(SAMPLES, d=1.0 / RATE)[:SAMPLES // 2]  # Frequency bins
-
-        # === Identify Peak Frequency ===
-        peak_idx = np.argmax(fft_vals)
-        peak_freq = freqs[peak_idx]
-        print(f"Peak frequency: {peak_freq:.2f} Hz")
-       # after you compute peak_freq ...
-        temp = f"{peak_freq:.1f} Hz"
-
-# clear or home
-        print("I: about to attempt LCD clear")
-        lcd.clear()               # reset display and cursor
-
-# optional: write a label on the first line
-        print("J: about to attempt LCD write")
-        lcd.write_string("Peak freq:")
-# move to second line
-        lcd.cursor_pos = (1, 0)
-# write the number
-        lcd.write_string(temp)
-
-        # === Optional: Plot the FFT Spectrum ===
-        #if PLOT:
-         #   plt.clf()
-          #  plt.plot(freqs, fft_vals)
-           # plt.title(f"Live Spectrum - Peak: {peak_freq:.2f} Hz")
-            #plt.xlabel("Frequency (Hz)")
-            #plt.ylabel("Amplitude")
-            #plt.grid(True)
-            #plt.pause(0.01)
-
-        # Short pause between iterations
-        time.sleep(0.2)
 
-except KeyboardInterrupt:
-    print("\nStopped.")
+# === Sampler stage: keeps capturing while the other stages work ===
+def capture():
+    data = source.capture()
+
+    # Only the ring position goes through the queue, not the samples
+    start = raw_ring.write(data)
+    time_ring.write(source.timestamps)
+    return start
+
+
+# === Sampler stage in SPLIT_PROCESS mode: wait for the sampler process ===
+def receive():
+    return frames.wait(SAMPLES, timeout=1.0)
+
+
+# === Analyzer stage ===
+def analyze(start):
+
+    # === Convert raw data to voltage (optional conversion) ===
+    # Here, we use the relation: raw_value * (PGA range / 32768)
+    # for the current gain, so no extra I2C reads are needed.
+    to_volts(raw_ring.window(start, SAMPLES), ads, out=voltages)
 
+    # === Preprocess: put samples on a uniform grid set by the read times ===
+    times = time_ring.window(start, SAMPLES)
+    rate = grid_rate(times, RATE)
+    samples = resample_linear(voltages, times, rate)
+    if not raw_ring.verify(start):
+        return None            # the sampler lapped us while we read the block
 
+    # === Compute FFT using a cached plan (zero-centers and windows) ===
+    plan = plan_for(SAMPLES, rate, WINDOW)
+    fft_vals = plan.run(samples)  # Single-sided real FFT (magnitude)
+
+    # === Identify Peak Frequency ===
+    peak_idx = np.argmax(fft_vals)
+    return float(plan.refine(peak_idx, PEAK)[0])
+
+
+# === Output stage ===
+def output(peak_freq):
+    print(f"Peak frequency: {peak_freq:.2f} Hz")
+    lcd.cursor_pos = (0, 0)      # lines are padded, no need to clear
+    lcd.write_string("Peak freq:".ljust(16))
+    lcd.cursor_pos = (1, 0)
+    lcd.write_string(f"{peak_freq:.1f} Hz".ljust(16))
+
+
+if SPLIT_PROCESS:
+    sampler.start()
+    pipeline = Pipeline(receive, analyze, output)
+else:
+    pipeline = Pipeline(capture, analyze, output)
+
+print("H: starting pipeline")
+try:
+    pipeline.run(report_every=REPORT)
+except KeyboardInterrupt:
+    print("\nStopped.")
+    print(pipeline.report())
+    print(f"Ring overruns: {raw_ring.overruns}")
+finally:
+    if SPLIT_PROCESS:
+        sampler.terminate()
+        sampler.join()
+        frames.close()
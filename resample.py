@@ -0,0 +1,75 @@
+"""Put irregularly timed ADC samples back on a uniform grid before the FFT.
+
+fftfreq(SAMPLES, d=1.0/RATE) assumes every sample is exactly 1/RATE apart.
+Late or skipped reads break that assumption and smear the spectrum, so the
+samples are interpolated at ..., tN - 1/RATE, tN using the read times that
+SampleSource records in its timestamps array.  The grid ends at the newest
+read tN, so a frame is never older than its last sample.  Those host read times set
+the time axis, so the grid uses the nominal RATE and the FFT axis follows
+them.  Pass the rate through grid_rate() first and use the result for the
+FFT as well, so the grid never runs past the last read (np.interp would
+just repeat the last sample).
+"""
+import numpy as np
+
+
+def uniform_grid(timestamps, rate, count=None):
+    """Return COUNT times spaced 1/RATE apart, ending at the last timestamp."""
+    if count is None:
+        count = len(timestamps)
+    return timestamps[-1] - np.arange(count - 1, -1, -1) / rate
+
+
+def grid_rate(timestamps, rate, count=None):
+    """RATE, raised if needed so COUNT grid points fit within the timestamps.
+
+    When the reads came faster than RATE, COUNT / RATE is longer than the
+    captured span; the grid then uses the rate of the reads instead.
+    """
+    if count is None:
+        count = len(timestamps)
+    span = timestamps[-1] - timestamps[0]
+    if span <= 0:
+        return rate
+    return max(rate, (count - 1) / span)
+
+
+def resample_linear(samples, timestamps, rate, out=None):
+    """Linearly interpolate samples taken at timestamps onto a uniform grid."""
+    grid = uniform_grid(timestamps, rate, len(samples))
+    result = np.interp(grid, timestamps, samples)
+    if out is None:
+        return result
+    out[:] = result
+    return out
+
+
+def resample_cubic(samples, timestamps, rate, out=None):
+    """Cubic Lagrange interpolation of samples taken at timestamps onto a uniform grid.
+
+    Each output sample is the cubic through the two reads either side of it
+    (one interval shifted inward at the ends), using their actual read
+    times, so jittered reads are fitted rather than assumed evenly spaced.
+    Works on all outputs at once.
+    """
+    samples = np.asarray(samples, dtype=float)
+    count = len(samples)
+    grid = uniform_grid(timestamps, rate, count)
+
+    # First of the 4 neighbours of every output time: shape (count, 4)
+    first = np.clip(np.searchsorted(timestamps, grid) - 2, 0, count - 4)
+    idx = first[:, None] + np.arange(4)
+    nodes = timestamps[idx]
+
+    # Lagrange weights: prod over m != j of (t - t_m) / (t_j - t_m)
+    weights = np.ones((count, 4))
+    for j in range(4):
+        for m in range(4):
+            if m != j:
+                weights[:, j] *= (grid - nodes[:, m]) / (nodes[:, j] - nodes[:, m])
+
+    result = (weights * samples[idx]).sum(axis=1)
+    if out is None:
+        return result
+    out[:] = result
+    return out
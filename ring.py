@@ -0,0 +1,114 @@
+"""Preallocated single-producer / single-consumer ring buffer of samples.
+
+One thread writes blocks with write(), another reads windows as views into
+the same fixed NumPy array, so nothing is allocated per frame.  There are no
+locks: only the writer changes written and only the reader changes read,
+and the writer publishes a block by bumping written after copying it in.
+The writer never waits; if it laps a reader the oldest samples are lost,
+which shows up in overruns / lost and in intact() for a window in use.
+"""
+import numpy as np
+
+
+class SampleRing:
+    """CAPACITY most recent samples of DTYPE.
+
+    Sample positions are absolute counts since the ring was created.  With
+    mirror=True every sample is stored twice, so any window is one
+    contiguous view (latest() and window() always return a single array);
+    otherwise windows that wrap come back as two views.  buffer (with a
+    byte offset) places the samples in existing memory, e.g. shared memory.
+    """
+
+    def __init__(self, capacity, dtype=np.float32, mirror=False, buffer=None, offset=0):
+        self.capacity = capacity
+        self.mirror = mirror
+        size = 2 * capacity if mirror else capacity
+        if buffer is None:
+            self._data = np.zeros(size, dtype=dtype)
+        else:
+            self._data = np.frombuffer(buffer, dtype, size, offset)
+        self.written = 0       # samples ever written (writer only)
+        self.read = 0          # next sample the reader wants (reader only)
+        self.overruns = 0      # times the reader found its data overwritten
+        self.lost = 0          # samples overwritten before they were read
+
+    @staticmethod
+    def nbytes(capacity, dtype, mirror=False):
+        """Bytes of buffer a ring with these settings needs."""
+        return (2 * capacity if mirror else capacity) * np.dtype(dtype).itemsize
+
+    # === Writer side ===
+
+    def write(self, block):
+        """Append a block of samples; returns the position of its first kept sample."""
+        n = self.capacity
+        total = len(block)
+        if total > n:
+            block = block[-n:]
+        start = self.written + total - len(block)
+        pos = start % n
+        first = min(len(block), n - pos)
+        data = self._data
+        data[pos:pos + first] = block[:first]
+        data[:len(block) - first] = block[first:]
+        if self.mirror:
+            data[pos + n:pos + n + first] = block[:first]
+            data[n:n + len(block) - first] = block[first:]
+        # Publish only after the samples are in place
+        self.written += total
+        return start
+
+    # === Reader side ===
+
+    def available(self):
+        """Unread samples still in the ring."""
+        return min(self.written - self.read, self.capacity)
+
+    def intact(self, start):
+        """True if samples from position start on have not been overwritten."""
+        return self.written - start <= self.capacity
+
+    def verify(self, start):
+        """intact(start), counting an overrun if the window was overwritten."""
+        if self.intact(start):
+            return True
+        self.overruns += 1
+        return False
+
+    def window(self, start, count):
+        """View(s) of COUNT samples from position start, oldest first.
+
+        Returns one array if the window is contiguous (always with mirror)
+        or a tuple of two arrays if it wraps.
+        """
+        if count > self.capacity:
+            raise ValueError("Window of {} samples exceeds ring capacity {}".format(
+                count, self.capacity))
+        pos = start % self.capacity
+        end = pos + count
+        if self.mirror or end <= self.capacity:
+            return self._data[pos:end]
+        return self._data[pos:], self._data[:end - self.capacity]
+
+    def latest(self, count):
+        """View(s) of the COUNT most recently written samples."""
+        return self.window(self.written - count, count)
+
+    def take(self, count):
+        """View(s) of the next COUNT unread samples, or None if not there yet.
+
+        Samples the writer has already overwritten are skipped and counted.
+        The reader position advances past the returned window.
+        """
+        written = self.written
+        if written - self.read > self.capacity:
+            skipped = written - self.capacity - self.read
+            self.read += skipped
+            self.lost += skipped
+            self.overruns += 1
+        if written - self.read < count:
+            return None
+        start = self.read
+        self.read += count
+        return self.window(start, count)
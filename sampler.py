@@ -0,0 +1,396 @@
+"""Deadline-paced ADC sample acquisition shared by the realtime scripts.
+
+Instead of busy-waiting on time.monotonic() for the whole sample interval, each
+read sleeps coarsely until just before its deadline and only spins for the
+last fraction of a millisecond.  The CPU is idle between conversions, which
+leaves the core free for the LCD/LED work.
+
+ReadySampleSource goes further and blocks on the ADS1115 ALERT/RDY pin, so
+there is exactly one I2C read per finished conversion.
+"""
+import threading
+import time
+import numpy as np
+from adafruit_ads1x15.ads1x15 import Mode
+from adafruit_ads1x15.analog_in import _ADS1X15_PGA_RANGE
+
+SPIN_MARGIN_MAX = 0.002      # never spin longer than this before a deadline
+# Conversion periods to wait after a MUX switch in continuous mode.  The
+# conversion in progress when the config is written still finishes with the
+# old input, so the new input's first result can take two periods (the
+# library's own _read() waits 2 / data_rate); 2.2 adds the oscillator's +-10%.
+SETTLE_PERIODS = 2.2
+# In single-shot mode the config write itself starts the conversion on the
+# new input, so one period (plus the +-10%) is enough.
+SINGLE_SHOT_PERIODS = 1.1
+MAX_REPEAT_FRACTION = 0.2    # more repeats than this means a quiet input, not a slow ADC
+CALIBRATION_TRIALS = 20
+
+
+def calibrate_spin_margin(trials=CALIBRATION_TRIALS, request=0.0005):
+    """Measure how late time.sleep() wakes up and return a safe spin margin (s)."""
+    worst = 0.0
+    for _ in range(trials):
+        start = time.monotonic()
+        time.sleep(request)
+        worst = max(worst, time.monotonic() - start - request)
+    # Leave some headroom over the worst oversleep we saw
+    return min(2 * worst + 0.0001, SPIN_MARGIN_MAX)
+
+
+class SampleSource:
+    """Read SAMPLES values from an AnalogIn channel at RATE sps.
+
+    Samples go into a preallocated int16 buffer that is reused by every
+    capture(), and the monotonic time of each read goes into timestamps so
+    late reads can be put back on a uniform grid (see resample.py).  After
+    each capture the achieved rate (sps), the timing jitter
+    (RMS deviation from the deadlines, in seconds) and the number of deadlines
+    missed by more than one interval (skips) are available as attributes.
+    """
+
+    def __init__(self, chan, rate, samples, spin_margin=None):
+        self.chan = chan
+        self.rate = rate
+        self.samples = samples
+        self.interval = 1.0 / rate
+        if spin_margin is None:
+            spin_margin = calibrate_spin_margin()
+        self.spin_margin = spin_margin
+
+        self.buffer = np.zeros(samples, dtype=np.int16)
+        self._lateness = np.zeros(samples)
+        self._times = np.zeros(samples)
+        self.timestamps = self._times
+        self.achieved_rate = 0.0
+        self.jitter = 0.0
+        self.skips = 0
+        self._index = 0
+        self._deadline = 0.0
+
+    def wait_until(self, deadline):
+        """Sleep until shortly before deadline, then spin the remainder."""
+        remaining = deadline - time.monotonic() - self.spin_margin
+        if remaining > 0:
+            time.sleep(remaining)
+        while time.monotonic() < deadline:
+            pass
+
+    def _tick(self):
+        """Wait for the next deadline and record how late we are for it."""
+        self.wait_until(self._deadline)
+        now = time.monotonic()
+        self._times[self._index] = now
+        self._lateness[self._index] = now - self._deadline
+        self._index += 1
+        self._deadline += self.interval
+        # Resynchronise instead of bursting if we fell a whole interval behind
+        if now > self._deadline:
+            self.skips += 1
+            self._deadline = now + self.interval
+
+    def capture(self):
+        """Fill and return the sample buffer, one read per sample interval.
+
+        Channels that support read_block() are read with fast pointer-less
+        reads, locking the bus per read so the pacing waits leave it free;
+        anything else falls back to chan.value.
+        """
+        buf = self.buffer
+        chan = self.chan
+        self._index = 0
+        self.skips = 0
+
+        start = time.monotonic()
+        self._deadline = start + self.interval
+        if hasattr(chan, "read_block"):
+            chan.read_block(self.samples, buf, wait=self._tick)
+        else:
+            for i in range(self.samples):
+                self._tick()
+                buf[i] = chan.value
+        end = time.monotonic()
+
+        lateness = self._lateness
+        self.achieved_rate = self.samples / (end - start)
+        self.jitter = float(np.sqrt(np.mean(lateness * lateness)))
+        return buf
+
+
+_volts_per_count = {}
+
+
+def volts_per_count(ads):
+    """Volts per raw 16-bit count at the ADC's current gain, cached per setting.
+
+    Same scale as AnalogIn.convert_to_voltage(), without any I2C reads.
+    """
+    key = (ads.gain, ads.bits)
+    lsb = _volts_per_count.get(key)
+    if lsb is None:
+        lsb = _ADS1X15_PGA_RANGE[ads.gain] / (1 << (ads.bits - 1)) / (1 << (16 - ads.bits))
+        _volts_per_count[key] = lsb
+    return lsb
+
+
+def to_volts(raw, ads, out=None):
+    """Convert a block of raw int16 readings to volts in one vectorized step."""
+    return np.multiply(raw, volts_per_count(ads), out=out)
+
+
+def to_normalized(raw, out=None):
+    """Convert a block of raw int16 readings to floats in [-1, 1)."""
+    return np.multiply(raw, 1.0 / 32768, out=out)
+
+
+class RateEstimator:
+    """Running diagnostic of how fast the ADC converts compared with the polling.
+
+    The ADS1115's internal oscillator is only +-10% accurate.  After every
+    capture, update() counts the reads that returned the same conversion
+    twice (repeats, from polling faster than the ADC converts) and derives
+    the conversion rate from the distinct samples over the capture's time
+    span, as continousread.py does once.  The result is exponentially
+    smoothed with weight ALPHA.  Captures of a near-constant input repeat
+    values for real and are ignored.
+
+    Repeats only show an ADC slower than the polling, so the estimate can
+    never exceed polling_rate and a fast oscillator goes unseen.  It is not
+    used for the frequency axis: the read times in timestamps set that (see
+    resample.py).
+    """
+
+    def __init__(self, nominal, alpha=0.1):
+        self.alpha = alpha
+        self.rate = float(nominal)
+        self.conversion_rate = float(nominal)
+        self.polling_rate = float(nominal)
+        self.repeats = 0
+        self.skips = 0
+
+    def update(self, source):
+        """Fold the last capture of a SampleSource in and return the smoothed rate."""
+        buf = source.buffer
+        times = source.timestamps
+        span = times[-1] - times[0]
+        if span <= 0:
+            return self.rate
+        intervals = len(buf) - 1
+        self.repeats = int(np.count_nonzero(buf[1:] == buf[:-1]))
+        self.skips = source.skips
+        self.polling_rate = intervals / span
+        if self.repeats > MAX_REPEAT_FRACTION * intervals:
+            return self.rate
+        self.conversion_rate = (intervals - self.repeats) / span
+        self.rate += self.alpha * (self.conversion_rate - self.rate)
+        return self.rate
+
+
+class ChannelScanner(SampleSource):
+    """Round-robin scan of several AnalogIn inputs on one ADS1x15.
+
+    Every read collects the finished conversion of the current input and, in
+    the same bus lock, switches the MUX to the next input.  The next read
+    waits a settle time counted from the end of that switch, not from the
+    previous deadline, so each sample really belongs to the input it is
+    tagged with.  With ads in Mode.SINGLE the switch also starts the next
+    conversion, so the wait is SINGLE_SHOT_PERIODS and the scan runs at
+    close to the data rate; in Mode.CONTINUOUS it is SETTLE_PERIODS, no
+    faster than reading each AnalogIn's value in turn.  capture() returns a
+    (channels, frames) int16 array with one row per input; the interleaved
+    reads, their channel tags and their timestamps stay available as buffer,
+    tags and timestamps.
+    """
+
+    def __init__(self, ads, chans, frames, spin_margin=None):
+        self.ads = ads
+        self.chans = chans
+        self.muxes = [chan.mux for chan in chans]
+        self.frames = frames
+        if ads.mode == Mode.SINGLE:
+            self.settle_periods = SINGLE_SHOT_PERIODS
+        else:
+            self.settle_periods = SETTLE_PERIODS
+        rate = ads.data_rate / self.settle_periods
+        super().__init__(chans[0], rate, frames * len(chans), spin_margin)
+
+        self.tags = np.tile(np.arange(len(chans), dtype=np.uint8), frames)
+        self.by_channel = np.zeros((len(chans), frames), dtype=np.int16)
+
+    def capture(self):
+        """Scan all inputs FRAMES times and return one row per input."""
+        ads = self.ads
+        muxes = self.muxes
+        count = len(muxes)
+        buf = self.buffer
+        self._index = 0
+        self.skips = 0
+
+        # Select the first input and let it settle before the scan starts.  The
+        # last capture already selected it, which would make ads.read() return
+        # straight away with the previous input's conversion.
+        settle = self.settle_periods / ads.data_rate
+        start = time.monotonic()
+        ads.read_then_select(muxes[0])
+        self._deadline = time.monotonic() + settle
+        for i in range(self.samples):
+            self._tick()
+            buf[i] = ads.read_then_select(muxes[(i + 1) % count])
+            # The new input only starts converting once the switch is written
+            self._deadline = time.monotonic() + settle
+        end = time.monotonic()
+
+        lateness = self._lateness
+        self.achieved_rate = self.samples / (end - start)
+        self.jitter = float(np.sqrt(np.mean(lateness * lateness)))
+        np.copyto(self.by_channel, buf.reshape(self.frames, count).T)
+        return self.by_channel
+
+
+class MultiADCSource(SampleSource):
+    """Staggered continuous-mode reads from several ADS1x15 on one I2C bus.
+
+    chans holds one AnalogIn per ADC, e.g. ADS1115s at 0x48-0x4B that all
+    run in CONTINUOUS mode at RATE.  Device k is read k/len(chans) of a
+    conversion period after device 0, so the bus carries an even stream of
+    reads instead of bursts.  capture() returns a (devices, frames) int16
+    array with one row per device, and times_by_device holds the matching
+    read times; the interleaved reads and their timestamps stay available as
+    buffer and timestamps, like any SampleSource.  bus_utilisation is the
+    fraction of the capture spent inside I2C reads; close to 1.0 means the
+    bus, not the ADCs, limits the sample rate.
+    """
+
+    def __init__(self, chans, rate, frames, spin_margin=None):
+        super().__init__(chans[0], rate * len(chans), frames * len(chans), spin_margin)
+        self.chans = chans
+        self.frames = frames
+        # Reads are recorded frame by frame, present them one row per device
+        self.by_device = self.buffer.reshape(frames, len(chans)).T
+        self.times_by_device = self._times.reshape(frames, len(chans)).T
+        self.bus_utilisation = 0.0
+
+    def capture(self):
+        """Read every ADC FRAMES times and return one row per device."""
+        buf = self.buffer
+        chans = self.chans
+        count = len(chans)
+        busy = 0.0
+        self._index = 0
+        self.skips = 0
+
+        start = time.monotonic()
+        self._deadline = start + self.interval
+        for frame in range(self.frames):
+            for k, chan in enumerate(chans):
+                self._tick()
+                before = time.monotonic()
+                buf[frame * count + k] = chan.value
+                busy += time.monotonic() - before
+        end = time.monotonic()
+
+        lateness = self._lateness
+        self.achieved_rate = self.samples / (end - start)
+        self.jitter = float(np.sqrt(np.mean(lateness * lateness)))
+        self.bus_utilisation = busy / (end - start)
+        return self.by_device
+
+
+# === Conversion-ready (ALERT/RDY) sampling ===
+
+class EdgeSource:
+    """Conversion-ready edges, delivered by a background thread.
+
+    wait() blocks until the next edge after the previous wait() returned.
+    Edges that arrive while nobody is waiting are counted but collapse into
+    one, so a slow reader never reads the same conversion twice.
+    """
+
+    def __init__(self, timeout=0.1):
+        self.timeout = timeout
+        self.edges = 0
+        self.last_edge = 0.0
+        self._ready = threading.Event()
+
+    def _edge(self, *_):
+        self.last_edge = time.monotonic()
+        self.edges += 1
+        self._ready.set()
+
+    def wait(self):
+        """Block until the next conversion-ready edge."""
+        if not self._ready.wait(self.timeout):
+            raise TimeoutError("No conversion-ready edge, is ALERT/RDY wired?")
+        self._ready.clear()
+
+    def close(self):
+        """Stop delivering edges."""
+
+
+class GPIOEdgeSource(EdgeSource):
+    """Edges from the ADS1115 ALERT/RDY pin wired to a BCM GPIO pin."""
+
+    def __init__(self, pin, falling=True, timeout=0.1):
+        super().__init__(timeout)
+        import RPi.GPIO as GPIO
+        self._gpio = GPIO
+        self.pin = pin
+        if GPIO.getmode() is None:
+            GPIO.setmode(GPIO.BCM)
+        # ALERT/RDY is open drain
+        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        GPIO.add_event_detect(pin, GPIO.FALLING if falling else GPIO.RISING,
+                              callback=self._edge)
+
+    def close(self):
+        self._gpio.remove_event_detect(self.pin)
+
+
+class SimulatedEdgeSource(EdgeSource):
+    """Edges at a fixed rate from a timer thread, for testing off the Pi."""
+
+    def __init__(self, rate, timeout=0.1):
+        super().__init__(timeout)
+        self.interval = 1.0 / rate
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        deadline = time.monotonic() + self.interval
+        while self._running:
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            self._edge()
+            deadline += self.interval
+
+    def close(self):
+        self._running = False
+        self._thread.join()
+
+
+class ReadySampleSource(SampleSource):
+    """SampleSource that reads once per ALERT/RDY edge instead of on a timer.
+
+    Call ads.enable_conversion_ready() first so the ADC signals every
+    conversion.  Jitter is the RMS delay between an edge and its read, and
+    skips counts conversions that finished without being read.
+    """
+
+    def __init__(self, chan, rate, samples, edges):
+        super().__init__(chan, rate, samples, spin_margin=0.0)
+        self.edges = edges
+
+    def _tick(self):
+        self.edges.wait()
+        now = time.monotonic()
+        self._times[self._index] = now
+        self._lateness[self._index] = now - self.edges.last_edge
+        self._index += 1
+
+    def capture(self):
+        first_edge = self.edges.edges
+        buf = super().capture()
+        self.skips = max(0, self.edges.edges - first_edge - self.samples)
+        return buf
@@ -0,0 +1,143 @@
+"""Sample rings in System V shared memory, for a separate sampler process.
+
+In one process the sampler thread competes with NumPy and the garbage
+collector for the GIL.  With SharedFrames the sampler runs in its own
+process and writes raw samples and their read times into SampleRings that
+live in a sysv_ipc shared memory segment; the analyzer process reads them
+as NumPy views with no copies and sleeps on a sysv_ipc semaphore until new
+samples are there.
+
+Layout of the segment: an int64 header (written counts of the two rings,
+capacity), then the raw int16 ring and the float64 time ring, both
+mirrored.  The written counts live in the header so both
+processes see them.
+"""
+import numpy as np
+import sysv_ipc
+from ring import SampleRing
+
+_HEADER = 24           # bytes: int64 raw written, times written, capacity
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+class SharedSampleRing(SampleRing):
+    """SampleRing whose written count is kept in shared memory.
+
+    Attaching never touches the shared count (the creator zeroes it), and
+    a new reader starts at the samples written from now on.
+    """
+
+    def __init__(self, capacity, dtype, buffer, offset, counter):
+        # Not attached yet, so the base class's written = 0 stays local
+        self._counter = None
+        super().__init__(capacity, dtype, mirror=True, buffer=buffer, offset=offset)
+        self._counter = counter            # 1-element int64 view
+        self.read = self.written
+
+    @property
+    def written(self):
+        return int(self._counter[0])
+
+    @written.setter
+    def written(self, value):
+        if self._counter is not None:
+            self._counter[0] = value
+
+
+class SharedFrames:
+    """Raw samples and their read times shared between two processes.
+
+    The sampler process creates it (or inherits it across fork) and calls
+    publish(); the analyzer calls wait() and reads frames through raw and
+    times.  attach(keys) opens an existing one from another process.
+    """
+
+    def __init__(self, capacity=None, keys=None):
+        if keys is None:
+            self._memory = sysv_ipc.SharedMemory(None, sysv_ipc.IPC_CREX,
+                                                 size=self.size(capacity))
+            self._semaphore = sysv_ipc.Semaphore(None, sysv_ipc.IPC_CREX, initial_value=0)
+            self.owner = True
+            np.frombuffer(self._memory, np.int64, 2)[:] = 0
+        else:
+            self._memory = sysv_ipc.SharedMemory(keys[0])
+            self._semaphore = sysv_ipc.Semaphore(keys[1])
+            self.owner = False
+
+        header = np.frombuffer(self._memory, np.int64, 3)
+        if capacity is None:
+            capacity = int(header[2])
+        else:
+            header[2] = capacity
+        self.capacity = capacity
+        self._header = header
+
+        offset = _HEADER
+        self.raw = SharedSampleRing(capacity, np.int16, self._memory, offset, header[0:1])
+        offset = _align(offset + SampleRing.nbytes(capacity, np.int16, mirror=True))
+        self.times = SharedSampleRing(capacity, np.float64, self._memory, offset, header[1:2])
+
+    @staticmethod
+    def size(capacity):
+        """Bytes of shared memory needed for capacity samples."""
+        raw = SampleRing.nbytes(capacity, np.int16, mirror=True)
+        times = SampleRing.nbytes(capacity, np.float64, mirror=True)
+        return _align(_HEADER + raw) + times
+
+    @property
+    def keys(self):
+        """(shared memory key, semaphore key) for attach() in another process."""
+        return self._memory.key, self._semaphore.key
+
+    @classmethod
+    def attach(cls, keys):
+        return cls(keys=keys)
+
+    # === Sampler process ===
+
+    def publish(self, block, timestamps):
+        """Append a captured block and wake the analyzer."""
+        # The analyzer waits on the raw count, so the times go in first
+        self.times.write(timestamps)
+        start = self.raw.write(block)
+        # Like EdgeSource, pending wake-ups collapse into one
+        if self._semaphore.value == 0:
+            self._semaphore.release()
+        return start
+
+    # === Analyzer process ===
+
+    def wait(self, count, timeout=None):
+        """Block until COUNT unread samples are there.
+
+        Returns their position in raw and times.  Raises TimeoutError if the
+        sampler wrote nothing for timeout seconds.
+        """
+        while self.raw.written - self.raw.read < count:
+            try:
+                self._semaphore.acquire(timeout)
+            except sysv_ipc.BusyError:
+                raise TimeoutError("No samples from the sampler process") from None
+        self.raw.take(count)
+        return self.raw.read - count
+
+    def close(self):
+        """Detach, and remove the IPC objects if this process created them."""
+        self.raw = self.times = self._header = None
+        self._memory.detach()
+        if self.owner:
+            self._memory.remove()
+            self._semaphore.remove()
+
+
+def run_sampler(frames, source):
+    """Sampler process main loop: capture blocks into frames until Ctrl+C."""
+    try:
+        while True:
+            data = source.capture()
+            frames.publish(data, source.timestamps)
+    except KeyboardInterrupt:
+        pass
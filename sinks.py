@@ -0,0 +1,230 @@
+"""Output sinks that never hold up the analysis.
+
+Each sink runs in its own thread and reads from a latest-value Mailbox:
+post() only replaces the value, so the analyzer never waits for a display.
+A sink renders at most max_rate times per second and always renders the
+newest frame, so frames that arrived in between are skipped rather than
+queued.  Per sink, rendered / dropped count frames shown and skipped and
+render_time / max_render_time the seconds spent drawing.
+
+Frames are stream.PitchFrame tuples (time, freq, note, confidence, rate).
+"""
+import colorsys
+import json
+import socket
+import threading
+import time
+
+
+class Mailbox:
+    """Latest-value slot shared by one poster and one reader thread."""
+
+    def __init__(self):
+        self.value = None
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def post(self, value):
+        with self._changed:
+            self.value = value
+            self.version += 1
+            self._changed.notify()
+
+    def wait(self, seen, timeout=None):
+        """(version, value) newer than version seen, or None on timeout."""
+        with self._changed:
+            if not self._changed.wait_for(lambda: self.version != seen, timeout):
+                return None
+            return self.version, self.value
+
+
+class Sink(threading.Thread):
+    """Base class: render(frame) the latest frame, at most max_rate per second."""
+
+    def __init__(self, max_rate=None, name=None):
+        super().__init__(name=name or type(self).__name__, daemon=True)
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.mailbox = Mailbox()
+        self.rendered = 0
+        self.dropped = 0
+        self.render_time = 0.0
+        self.max_render_time = 0.0
+        self.error = None
+        self._running = True
+
+    def post(self, frame):
+        self.mailbox.post(frame)
+
+    def render(self, frame):
+        raise NotImplementedError("Subclass must implement render.")
+
+    def close(self):
+        """Release the output device; called from stop()."""
+
+    def run(self):
+        seen = 0
+        next_render = 0.0
+        try:
+            while self._running:
+                # Respect the rate limit before looking, so the wait ends on the newest frame
+                delay = next_render - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                got = self.mailbox.wait(seen, timeout=0.1)
+                if got is None:
+                    continue
+                version, frame = got
+                self.dropped += version - seen - 1
+                seen = version
+
+                start = time.monotonic()
+                self.render(frame)
+                elapsed = time.monotonic() - start
+                self.rendered += 1
+                self.render_time += elapsed
+                self.max_render_time = max(self.max_render_time, elapsed)
+                next_render = start + self.interval
+        except Exception as exc:
+            self.error = exc
+
+    def stop(self):
+        self._running = False
+        if self.is_alive():
+            self.join()
+        self.close()
+
+    def report(self):
+        mean = self.render_time / self.rendered if self.rendered else 0.0
+        return (f"{self.name}: {self.rendered} shown, {self.dropped} skipped, "
+                f"{1000 * mean:.1f} ms avg / {1000 * self.max_render_time:.1f} ms max")
+
+
+class SinkSet:
+    """Post every frame to several sinks."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+        return self
+
+    def post(self, frame):
+        for sink in self.sinks:
+            if sink.error is not None:
+                raise sink.error
+            sink.post(frame)
+
+    def stop(self):
+        for sink in self.sinks:
+            sink.stop()
+
+    def report(self):
+        return "\n".join(sink.report() for sink in self.sinks)
+
+
+# === Sinks ===
+
+class StdoutSink(Sink):
+    def render(self, frame):
+        print(f"Detected: {frame.freq:.1f} Hz → {frame.note or '--'}")
+
+
+class FileSink(Sink):
+    """Appends one CSV line per rendered frame."""
+
+    def __init__(self, path, max_rate=None):
+        super().__init__(max_rate)
+        self._file = open(path, "a", buffering=1)
+
+    def render(self, frame):
+        self._file.write(f"{frame.time:.4f},{frame.freq:.2f},{frame.note or ''},"
+                         f"{frame.confidence:.3f}\n")
+
+    def close(self):
+        self._file.close()
+
+
+class SocketSink(Sink):
+    """Sends every rendered frame as a JSON UDP datagram to (host, port)."""
+
+    def __init__(self, host, port, max_rate=None):
+        super().__init__(max_rate)
+        self.address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def render(self, frame):
+        self._socket.sendto(json.dumps(frame._asdict()).encode(), self.address)
+
+    def close(self):
+        self._socket.close()
+
+
+class LCDSink(Sink):
+    """Note on line 1 and frequency on line 2 of an RPLCD CharLCD."""
+
+    def __init__(self, lcd, max_rate=10, cols=16):
+        super().__init__(max_rate)
+        self.lcd = lcd
+        self.cols = cols
+
+    def render(self, frame):
+        # Lines are padded, so no lcd.clear() is needed
+        self.lcd.cursor_pos = (0, 0)
+        self.lcd.write_string((frame.note or "--").ljust(self.cols))
+        self.lcd.cursor_pos = (1, 0)
+        self.lcd.write_string(f"{frame.freq:5.1f} Hz".ljust(self.cols))
+
+
+class NeoPixelSink(Sink):
+    """Rainbow bar whose length follows the frequency (0 to max_freq Hz)."""
+
+    def __init__(self, pixels, count, max_rate=30, max_freq=430):
+        super().__init__(max_rate)
+        self.pixels = pixels
+        self.count = count
+        self.max_freq = max_freq
+        self._rainbow = []
+        for i in range(count):
+            r, g, b = colorsys.hsv_to_rgb(i / count, 1.0, 1.0)
+            self._rainbow.append((int(r * 255), int(g * 255), int(b * 255)))
+        self._off = [(0, 0, 0)] * count
+
+    def render(self, frame):
+        fraction = min(max(frame.freq, 0.0), self.max_freq) / self.max_freq
+        lit = int(fraction * self.count)
+        if lit:
+            self.pixels[:lit] = self._rainbow[:lit]
+        if lit < self.count:
+            self.pixels[lit:] = self._off[lit:]
+        self.pixels.show()
+
+    def close(self):
+        self.pixels.fill((0, 0, 0))
+        self.pixels.show()
+
+
+class ST7735Sink(Sink):
+    """Note and frequency on an ST7735 TFT (adafruit_rgb_display).
+
+    Needs Pillow; display is an adafruit_rgb_display.st7735 display.
+    """
+
+    def __init__(self, display, max_rate=10):
+        super().__init__(max_rate)
+        from PIL import Image, ImageDraw, ImageFont
+        self.display = display
+        width, height = display.width, display.height
+        if display.rotation % 180 == 90:
+            width, height = height, width
+        self._image = Image.new("RGB", (width, height))
+        self._draw = ImageDraw.Draw(self._image)
+        self._font = ImageFont.load_default()
+
+    def render(self, frame):
+        draw = self._draw
+        draw.rectangle((0, 0) + self._image.size, fill=(0, 0, 0))
+        draw.text((4, 4), frame.note or "--", font=self._font, fill=(255, 255, 255))
+        draw.text((4, 20), f"{frame.freq:5.1f} Hz", font=self._font, fill=(0, 255, 0))
+        self.display.image(self._image)
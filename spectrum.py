@@ -0,0 +1,378 @@
+"""Cached FFT plans for the realtime pitch scripts.
+
+Everything that only depends on the window length, the sample rate and the
+window type (bin frequencies, window coefficients and the work buffers) is
+built once per configuration instead of every frame.  Lookup tables other
+modules derive from a plan live in its tables dict, so they are dropped
+with the plan from the same bounded cache.  Only the real half of the
+spectrum is computed (rfft).
+"""
+from collections import OrderedDict
+import numpy as np
+from notes import freq_to_midi
+from resample import grid_rate
+from ring import SampleRing
+
+RATE_STEP = 0.5        # sps, measured rates are rounded to this before lookup
+MAX_PLANS = 8
+SDFT_DAMPING = 0.99995 # per-sample pole radius of the sliding DFT
+
+WINDOWS = {
+    "rect": np.ones,
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+}
+
+# Jacobsen's estimator is exact for rect windows, tapered windows use the
+# "Q" form (Jacobsen & Kootsookos, "Fast, Accurate Frequency Estimators")
+JACOBSEN_Q = {"hann": 0.55, "hamming": 0.60, "blackman": 0.55}
+
+_SQRT_2_3 = np.sqrt(2.0 / 3.0)
+
+# rfft only takes an out array from NumPy 2.0 on
+try:
+    np.fft.rfft(np.zeros(2), out=np.zeros(2, dtype=complex))
+    _RFFT_OUT = True
+except TypeError:
+    _RFFT_OUT = False
+
+
+def _quinn_tau(x):
+    return (0.25 * np.log(3 * x * x + 6 * x + 1)
+            - np.sqrt(6) / 24 * np.log((x + 1 - _SQRT_2_3) / (x + 1 + _SQRT_2_3)))
+
+
+def refine_peaks(spectrum, magnitude, bins, method="parabolic", window="hann"):
+    """Sub-bin offsets and magnitudes of the peaks at the given bin indices.
+
+    method is one of
+      "parabolic": parabola through the log-magnitudes of the 3 bins
+      "jacobsen":  Jacobsen's complex 3-bin estimator (rect or tapered window)
+      "quinn":     Quinn's second estimator (rect window only)
+    Returns (fractional bins, magnitudes); multiply the bins by rate/samples
+    for Hz.  Works on arrays of bins as well as on a single bin.
+    """
+    k = np.clip(np.asarray(bins), 1, len(magnitude) - 2)
+    tiny = np.finfo(float).tiny
+    alpha = np.log(magnitude[k - 1] + tiny)
+    beta = np.log(magnitude[k] + tiny)
+    gamma = np.log(magnitude[k + 1] + tiny)
+
+    if method == "parabolic":
+        denom = alpha - 2 * beta + gamma
+        delta = np.where(denom != 0, 0.5 * (alpha - gamma) / np.where(denom != 0, denom, 1), 0.0)
+    elif method == "jacobsen":
+        prev, peak, nxt = spectrum[k - 1], spectrum[k], spectrum[k + 1]
+        if window == "rect":
+            denom = 2 * peak - prev - nxt
+            delta = ((prev - nxt) / np.where(denom != 0, denom, 1)).real
+        else:
+            denom = 2 * peak + prev + nxt
+            delta = -JACOBSEN_Q[window] * ((nxt - prev) / np.where(denom != 0, denom, 1)).real
+    elif method == "quinn":
+        if window != "rect":
+            raise ValueError("Quinn's estimator needs the rect window, not {}".format(window))
+        peak_power = np.abs(spectrum[k]) ** 2 + tiny
+        ap = (spectrum[k + 1] * np.conj(spectrum[k])).real / peak_power
+        am = (spectrum[k - 1] * np.conj(spectrum[k])).real / peak_power
+        dp = -ap / (1 - ap)
+        dm = am / (1 - am)
+        delta = (dp + dm) / 2 + _quinn_tau(dp * dp) - _quinn_tau(dm * dm)
+    else:
+        raise ValueError("Unknown peak method: {}".format(method))
+
+    delta = np.clip(delta, -0.5, 0.5)
+    # Height of the log-magnitude parabola at the refined position
+    peak_mag = np.exp(beta - 0.25 * (alpha - gamma) * delta)
+    return k + delta, peak_mag
+
+
+def resonate(state, coeffs, values, powers):
+    """Run the one-pole resonators state <- coeffs * state + x over a block.
+
+    Same result as len(values) single-sample updates in one product:
+    values @ coeffs ** (count - 1 - i).  powers caches those per block
+    length; state is updated in place and returned.
+    """
+    count = len(values)
+    block = powers.get(count)
+    if block is None:
+        exponents = np.arange(count - 1, -1, -1)[:, None]
+        block = powers[count] = coeffs ** exponents
+    state *= block[0] * coeffs
+    state += values @ block
+    return state
+
+
+class SpectrumPlan:
+    """Precomputed real FFT of SAMPLES points at RATE sps with a WINDOW.
+
+    run() zero-centres and windows a frame into a preallocated buffer and
+    writes the complex and magnitude spectra into the preallocated spectrum
+    and magnitude arrays (before NumPy 2.0 the rfft result is a temporary
+    that is copied in).  freqs[i] is the frequency of bin i; tables holds
+    lookup tables other modules build for this plan.
+    """
+
+    def __init__(self, samples, rate, window="hann"):
+        self.samples = samples
+        self.rate = rate
+        self.window_type = window
+        self.window = WINDOWS[window](samples)
+        self.freqs = np.fft.rfftfreq(samples, d=1.0 / rate)
+        self.tables = {}
+
+        self.frame = np.zeros(samples)
+        self.spectrum = np.zeros(samples // 2 + 1, dtype=complex)
+        self.magnitude = np.zeros(samples // 2 + 1)
+
+    def run(self, samples):
+        """Return the magnitude spectrum of one frame of samples."""
+        frame = self.frame
+        np.subtract(samples, np.mean(samples), out=frame)
+        frame *= self.window
+        if _RFFT_OUT:
+            np.fft.rfft(frame, out=self.spectrum)
+        else:
+            self.spectrum[:] = np.fft.rfft(frame)
+        np.abs(self.spectrum, out=self.magnitude)
+        return self.magnitude
+
+    def refine(self, bins, method="parabolic"):
+        """Refined frequencies (Hz) and magnitudes of the peaks at bins."""
+        fine_bins, mags = refine_peaks(self.spectrum, self.magnitude, bins,
+                                       method, self.window_type)
+        return fine_bins * (self.rate / self.samples), mags
+
+
+_plans = OrderedDict()
+
+
+def plan_for(samples, rate, window="hann"):
+    """Return the cached SpectrumPlan for (samples, rate, window).
+
+    The rate is rounded to RATE_STEP so a slowly drifting measured rate
+    reuses the same plan; only the MAX_PLANS most recent plans are kept.
+    """
+    rate = round(rate / RATE_STEP) * RATE_STEP
+    key = (samples, rate, window)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = SpectrumPlan(samples, rate, window)
+        if len(_plans) > MAX_PLANS:
+            _plans.popitem(last=False)
+    else:
+        _plans.move_to_end(key)
+    return plan
+
+
+class SlidingSTFT:
+    """Overlapping STFT frames over a ring of the most recent samples.
+
+    push() appends a block of samples (and their read times) as they are
+    captured; once SAMPLES have been seen, a new frame is due every HOP
+    samples and run() returns its magnitude spectrum.  The samples live in
+    mirrored SampleRings, so the latest SAMPLES are always one contiguous
+    slice and no frame is ever copied together.
+    """
+
+    def __init__(self, samples, hop, window="hann"):
+        self.samples = samples
+        self.hop = hop
+        self.window = window
+        self.plan = None
+        self.start = None      # time of the first sample of the last frame
+        self._values = SampleRing(samples, float, mirror=True)
+        self._times = SampleRing(samples, float, mirror=True)
+        self._since_frame = 0
+
+    def push(self, values, times):
+        """Append samples taken at times; return True if a new frame is due."""
+        self._values.write(values)
+        self._times.write(times)
+        self._since_frame += len(values)
+        return self.ready()
+
+    def ready(self):
+        """True once a full window is buffered and HOP new samples arrived."""
+        return self._values.written >= self.samples and self._since_frame >= self.hop
+
+    def frame(self):
+        """Views of the latest SAMPLES values and their times, oldest first."""
+        return self._values.latest(self.samples), self._times.latest(self.samples)
+
+    def run(self, rate, resample=None):
+        """Magnitude spectrum of the latest frame at rate sps.
+
+        If resample is given (e.g. resample.resample_linear) the frame is
+        first put on a uniform grid using the recorded times, at the rate
+        resample.grid_rate() allows; plan.rate is the rate actually used.
+        """
+        values, times = self.frame()
+        if resample is not None:
+            rate = grid_rate(times, rate)
+            values = resample(values, times, rate)
+            # The grid ends at the newest read
+            self.start = times[-1] - (self.samples - 1) / rate
+        else:
+            self.start = times[0]
+        self._since_frame = 0
+        self.plan = plan_for(self.samples, rate, self.window)
+        return self.plan.run(values)
+
+
+class PhaseVocoder:
+    """Instantaneous frequency of spectral peaks from consecutive frames.
+
+    A sinusoid's phase at the start of a frame advances by 2 pi f dt when
+    the frame start moves by dt seconds, so comparing each peak bin with the
+    previous frame's phase gives f far more precisely than the bin width
+    (unambiguously within 1 / (2 dt) of the bin centre).  The previous
+    complex spectrum is kept in a preallocated buffer; freqs and cents hold
+    the results for the last update().
+    """
+
+    def __init__(self, samples, peaks=3):
+        self.samples = samples
+        self.peaks = peaks
+        self.freqs = np.zeros(peaks)
+        self.cents = np.zeros(peaks)
+        self._previous = np.zeros(samples // 2 + 1, dtype=complex)
+        self._start = None
+
+    def top_bins(self, magnitude):
+        """Bins of the PEAKS largest local maxima, strongest first."""
+        inner = magnitude[1:-1]
+        maxima = np.flatnonzero((inner > magnitude[:-2]) & (inner >= magnitude[2:])) + 1
+        if len(maxima) > self.peaks:
+            keep = np.argpartition(magnitude[maxima], -self.peaks)[-self.peaks:]
+            maxima = maxima[keep]
+        return maxima[np.argsort(magnitude[maxima])[::-1]]
+
+    def update(self, plan, start, bins=None):
+        """Phase-derived frequencies of bins (default: the top peaks).
+
+        plan is the FFT plan that has just run on the frame starting at time
+        start; returns the number of valid results in freqs and cents, 0 on
+        the first frame or when the frames did not advance.
+        """
+        previous, last_start = self._previous, self._start
+        self._start = start
+        if bins is None:
+            bins = self.top_bins(plan.magnitude)
+        bins = np.asarray(bins, dtype=int)[:self.peaks]
+
+        found = 0
+        if last_start is not None and start > last_start:
+            dt = start - last_start
+            centre = plan.freqs[bins]
+            advance = np.angle(plan.spectrum[bins] * np.conj(previous[bins]))
+            # Deviation from the bin centre's expected advance, wrapped to +-pi
+            deviation = np.angle(np.exp(1j * (advance - 2 * np.pi * centre * dt)))
+            found = len(bins)
+            self.freqs[:found] = centre + deviation / (2 * np.pi * dt)
+            midi = freq_to_midi(np.maximum(self.freqs[:found], np.finfo(float).tiny))
+            self.cents[:found] = 100 * (midi - np.round(midi))
+        previous[:] = plan.spectrum
+        return found
+
+
+class SlidingDFT:
+    """Sliding DFT of the latest SAMPLES samples, kept current for a few bins.
+
+    Each bin k is a resonator updated per sample with the damped recurrence
+
+        Y_k <- r e^(j 2 pi k / N) Y_k + x(n) - r^N x(n - N)
+
+    so push() costs O(len(bins)) per sample instead of an FFT per frame.
+    The pole radius r < 1 keeps rounding errors from growing; every RESYNC
+    samples the bins are recomputed with an FFT of the ring, weighted by the
+    same damping, so no error can accumulate.  The bins are therefore those
+    of a frame tapered by r^age on top of the window: with the default r
+    the oldest sample is weighted r^(N-1) = 0.975 at N=512, and magnitudes
+    come out 1-1.5% below an rfft of the plain frame.  With
+    window="hann" the neighbouring bins are tracked too and combined in the
+    frequency domain.  magnitude is a preallocated array updated in place
+    by every push().
+    """
+
+    def __init__(self, samples, bins, window="rect", damping=SDFT_DAMPING, resync=None):
+        if window not in ("rect", "hann"):
+            raise ValueError("Sliding DFT supports rect and hann windows, not {}".format(window))
+        self.samples = samples
+        self.bins = np.asarray(bins)
+        self.window = window
+        self.resync = samples if resync is None else resync
+        n = samples
+
+        if window == "hann":
+            tracked = np.unique(np.concatenate((self.bins - 1, self.bins, self.bins + 1)))
+        else:
+            tracked = np.unique(self.bins)
+        self._tracked = tracked % n
+        self._pick = np.searchsorted(tracked, self.bins)
+        self._below = np.searchsorted(tracked, self.bins - 1)
+        self._above = np.searchsorted(tracked, self.bins + 1)
+        theta = 2 * np.pi * self._tracked / n
+        self._coeffs = damping * np.exp(1j * theta)
+        self._tail = damping ** n
+        # Y_k = e^(-j theta) X_k, X_k the DFT with the oldest sample first
+        self._to_dft = np.exp(1j * theta)
+        self._ages = damping ** np.arange(n - 1, -1, -1)
+        self._powers = {}
+
+        self._state = np.zeros(len(tracked), dtype=complex)
+        self._ring = np.zeros(2 * n)
+        self._pos = 0
+        self._since_sync = 0
+        self.magnitude = np.zeros(len(self.bins))
+
+    def freqs(self, rate):
+        """Frequencies (Hz) of the tracked bins at rate sps."""
+        return self.bins * (rate / self.samples)
+
+    def push(self, values):
+        """Slide the window over a block of new samples; return magnitude."""
+        values = np.asarray(values, dtype=float)
+        n = self.samples
+        if len(values) > n:
+            self.push(values[:-n])
+            values = values[-n:]
+        count = len(values)
+
+        # Samples leaving the window, from the double-written ring
+        outgoing = self._ring[self._pos:self._pos + count]
+        resonate(self._state, self._coeffs, values - self._tail * outgoing, self._powers)
+
+        pos = self._pos
+        first = min(count, n - pos)
+        self._ring[pos:pos + first] = values[:first]
+        self._ring[pos + n:pos + n + first] = values[:first]
+        if count > first:
+            self._ring[:count - first] = values[first:]
+            self._ring[n:n + count - first] = values[first:]
+        self._pos = (pos + count) % n
+
+        self._since_sync += count
+        if self._since_sync >= self.resync:
+            self.sync()
+        return self._update_magnitude()
+
+    def sync(self):
+        """Recompute the tracked (damped) bins from the buffered samples."""
+        frame = self._ring[self._pos:self._pos + self.samples]
+        exact = np.fft.fft(frame * self._ages)
+        self._state[:] = exact[self._tracked] / self._to_dft
+        self._since_sync = 0
+
+    def spectrum(self):
+        """Complex DFT values of the requested bins (oldest sample first)."""
+        dft = self._state * self._to_dft
+        if self.window == "hann":
+            return 0.5 * dft[self._pick] - 0.25 * (dft[self._below] + dft[self._above])
+        return dft[self._pick]
+
+    def _update_magnitude(self):
+        np.abs(self.spectrum(), out=self.magnitude)
+        return self.magnitude
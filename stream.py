@@ -0,0 +1,174 @@
+"""asyncio front-end for the capture / FFT loop.
+
+    async for frame in pitch_stream(source, ads, SAMPLES):
+        ...
+
+The blocking I2C reads run in a continuous loop in one dedicated executor
+thread, which writes each block into a ring and wakes the event loop with
+call_soon_threadsafe, so capture never waits for the event loop: a loop
+stalled by a slow consumer only shows up as ring overruns.  Every hop the
+sliding STFT produces a PitchFrame that replaces the previous one in a
+latest-value slot; any number of consumers (LCD, LEDs, network, buttons)
+can run as coroutines and each takes the newest frame whenever it is
+ready, skipping the ones it was too slow for.
+"""
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from notes import freq_to_note
+from pitch import make_detector
+from resample import resample_linear
+from ring import SampleRing
+from sampler import to_volts
+from spectrum import SlidingSTFT
+
+RING_BLOCKS = 16       # captured blocks kept while the event loop is busy
+
+PitchFrame = namedtuple("PitchFrame", "time freq note confidence rate")
+
+
+class Latest:
+    """Latest-value slot: put() replaces the value, get() waits for a newer one."""
+
+    def __init__(self):
+        self.value = None
+        self.version = 0
+        self.error = None
+        self._changed = asyncio.Event()
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def put(self, value):
+        self.value = value
+        self.version += 1
+        self._wake()
+
+    def fail(self, error):
+        """Make every waiting and future get() raise error."""
+        self.error = error
+        self._wake()
+
+    async def get(self, seen=0):
+        """(version, value) of the first value newer than version seen."""
+        while self.version == seen:
+            if self.error is not None:
+                raise self.error
+            await self._changed.wait()
+        return self.version, self.value
+
+
+class PitchStream:
+    """Continuous capture in an executor thread, analysis on the event loop.
+
+    source captures one hop of samples per call; detector is one of the
+    spectrum-based detectors in pitch.py (fft, hps, harmonic_sum).
+    frames counts the frames produced and overruns the blocks the sampler
+    overwrote before they were analysed.
+    """
+
+    def __init__(self, source, ads, samples, window="hann",
+                 detector="fft", method="parabolic"):
+        self.source = source
+        self.ads = ads
+        self.hop = source.samples
+        self.stft = SlidingSTFT(samples, self.hop, window)
+        self.detector = make_detector(detector, window=window, method=method)
+        self.latest = Latest()
+        self.frames = 0
+
+        self._raw = SampleRing(RING_BLOCKS * self.hop, source.buffer.dtype)
+        self._times = SampleRing(RING_BLOCKS * self.hop, float)
+        self._captured = asyncio.Event()
+        self._running = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="i2c")
+        self._task = None
+
+    @property
+    def overruns(self):
+        return self._raw.overruns
+
+    def _capture_loop(self, loop):
+        """Runs in the executor thread: hops into the rings until stopped."""
+        try:
+            while self._running:
+                data = self.source.capture()
+                self._times.write(self.source.timestamps)
+                self._raw.write(data)
+                loop.call_soon_threadsafe(self._captured.set)
+        finally:
+            # Wake run() so it sees the loop has ended (or failed)
+            loop.call_soon_threadsafe(self._captured.set)
+
+    def _analyze(self, start):
+        volts = to_volts(self._raw.window(start, self.hop), self.ads)
+        ready = self.stft.push(volts, self._times.window(start, self.hop))
+        if not self._raw.verify(start) or not ready:
+            return None
+        # The read times set the time axis, so grid at the nominal rate
+        self.stft.run(self.source.rate, resample_linear)
+        freq, confidence = self.detector.from_plan(self.stft.plan)
+        return PitchFrame(float(self._times.latest(1)[0]), freq,
+                          freq_to_note(freq), confidence, self.stft.plan.rate)
+
+    async def run(self):
+        """Capture and analyse until cancelled."""
+        loop = asyncio.get_running_loop()
+        self._running = True
+        capture = loop.run_in_executor(self._executor, self._capture_loop, loop)
+        try:
+            while True:
+                await self._captured.wait()
+                self._captured.clear()
+                if capture.done():
+                    capture.result()    # raises what stopped the capture loop
+                    raise RuntimeError("Capture loop stopped")
+                # Every hop captured since the last wake-up, oldest first
+                while self._raw.take(self.hop) is not None:
+                    frame = self._analyze(self._raw.read - self.hop)
+                    if frame is not None:
+                        self.frames += 1
+                        self.latest.put(frame)
+        except Exception as exc:
+            self.latest.fail(exc)
+            raise
+        finally:
+            self._running = False
+            await asyncio.wait([capture])
+
+    def start(self):
+        self._task = asyncio.ensure_future(self.run())
+        return self
+
+    async def stop(self):
+        """Cancel capture; errors were already raised to the consumers."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def __aiter__(self):
+        """The newest frame each time the consumer asks; stale ones are skipped."""
+        seen = 0
+        while True:
+            seen, frame = await self.latest.get(seen)
+            yield frame
+
+    async def every(self, interval):
+        """Like iterating the stream, but at most one frame per interval seconds."""
+        loop = asyncio.get_running_loop()
+        async for frame in self:
+            started = loop.time()
+            yield frame
+            await asyncio.sleep(max(0.0, started + interval - loop.time()))
+
+
+async def pitch_stream(source, ads, samples, **kwargs):
+    """Start a PitchStream and yield its frames; stops it when the loop ends."""
+    stream = PitchStream(source, ads, samples, **kwargs).start()
+    try:
+        async for frame in stream:
+            yield frame
+    finally:
+        await stream.stop()
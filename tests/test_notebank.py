@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from notebank import NoteBank, max_note_freq
+
+RATE = 860
+
+
+def test_no_centre_within_a_bandwidth_of_nyquist():
+    bank = NoteBank(RATE)
+    assert bank.freqs.max() < max_note_freq(RATE) < RATE / 2
+    assert "A4" not in bank.names
+
+
+def test_input_near_nyquist_reports_nearest_kept_note():
+    t = np.arange(10 * RATE) / RATE
+    bank = NoteBank(RATE)
+    bank.push(np.sin(2 * np.pi * 425.0 * t))
+    freq, _ = bank.best()
+    assert freq == pytest.approx(415.3, abs=0.1)
+
+
+def test_lower_rate_silences_centres_above_the_new_limit():
+    bank = NoteBank(2 * RATE)
+    assert "A4" in bank.names
+    bank.tune(RATE)
+    t = np.arange(10 * RATE) / RATE
+    levels = bank.push(np.sin(2 * np.pi * 440.0 * t))
+    assert not levels[~bank.usable].any()
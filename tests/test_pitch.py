@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from pitch import make_detector
+
+RATE = 860
+SAMPLES = 512
+
+
+def tone(f0, amplitudes):
+    """Harmonic tone: partial h + 1 of f0 with amplitudes[h]."""
+    t = np.arange(SAMPLES) / RATE
+    return sum(a * np.sin(2 * np.pi * (h + 1) * f0 * t) for h, a in enumerate(amplitudes))
+
+
+@pytest.mark.parametrize("f0", [100.0, 103.8])
+def test_hps_ignores_partial_above_quarter_rate(f0):
+    # The third partial (above rate/4) must not win on its own
+    x = tone(f0, (1, 0.8, 0.5, 0.05))
+    freq, _ = make_detector("hps").detect(x, RATE)
+    assert freq == pytest.approx(f0, abs=1.0)
+    assert make_detector("fft").detect(x, RATE)[0] == pytest.approx(f0, abs=1.0)
+
+
+@pytest.mark.parametrize("f0, amplitudes", [
+    (110.0, (0.2, 1, 0.6, 0.4)),
+    (150.0, (0.3, 1, 0.5)),
+    (196.0, (0.5, 1, 0.3)),
+])
+def test_hps_finds_fundamental_below_strong_harmonic(f0, amplitudes):
+    freq, _ = make_detector("hps").detect(tone(f0, amplitudes), RATE)
+    assert freq == pytest.approx(f0, abs=1.0)
+
+
+@pytest.mark.parametrize("f0", [300.0, 400.0])
+def test_hps_reports_pure_tone_above_quarter_rate(f0):
+    freq, confidence = make_detector("hps").detect(tone(f0, (1,)), RATE)
+    assert freq == pytest.approx(f0, abs=1.0)
+    assert confidence > 0
+
+
+def test_hps_silence():
+    assert make_detector("hps").detect(np.zeros(SAMPLES), RATE) == (0.0, 0.0)
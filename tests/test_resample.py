@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from resample import grid_rate, resample_cubic, resample_linear, uniform_grid
+
+RATE = 860
+SAMPLES = 512
+
+
+def jittered_sine(freq, jitter, seed=0):
+    """A sine read at 1/RATE steps, each read up to jitter seconds late."""
+    rng = np.random.default_rng(seed)
+    times = np.arange(SAMPLES) / RATE + rng.uniform(0, jitter, SAMPLES)
+    rate = grid_rate(times, RATE)
+    truth = np.sin(2 * np.pi * freq * uniform_grid(times, rate))
+    return np.sin(2 * np.pi * freq * times), times, rate, truth
+
+
+def rms(error):
+    return float(np.sqrt(np.mean(error * error)))
+
+
+@pytest.mark.parametrize("freq", [100.0, 220.0, 330.0])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_cubic_beats_linear_and_raw_reads(freq, seed):
+    samples, times, rate, truth = jittered_sine(freq, 0.0003, seed)
+    raw = rms(samples - truth)
+    linear = rms(resample_linear(samples, times, rate) - truth)
+    cubic = rms(resample_cubic(samples, times, rate) - truth)
+    assert cubic < linear and cubic < raw
+
+
+def test_cubic_is_exact_for_cubics():
+    times = np.sort(np.random.default_rng(3).uniform(0, 1, 64))
+    poly = np.polynomial.Polynomial([0.5, -1.0, 2.0, 3.0])
+    rate = grid_rate(times, 50)
+    grid = uniform_grid(times, rate)
+    assert resample_cubic(poly(times), times, rate) == pytest.approx(poly(grid))
+
+
+def test_uniform_reads_pass_through():
+    times = np.arange(SAMPLES) / RATE
+    samples = np.sin(2 * np.pi * 100 * times)
+    out = np.empty(SAMPLES)
+    assert resample_cubic(samples, times, RATE, out=out) is out
+    assert out == pytest.approx(samples)
@@ -97,6 +97,68 @@ def make_i2c_rdwr_data(messages):
 # pylint: enable=attribute-defined-outside-init
 
 
+class I2CTransaction:
+    """A reusable batch of I2C messages submitted with a single I2C_RDWR ioctl.
+
+    Queue messages with write() and read(), then call submit() as often as
+    needed.  The ioctl structure is built once on the first submit, so repeated
+    submits make one syscall and no allocations.  Writable write buffers are
+    used in place (change their contents between submits to send new data),
+    read-only ones are copied when queued.  All reads land in the reusable
+    ``result`` bytearray; read() returns the offset of its bytes there.
+    """
+
+    def __init__(self, bus):
+        self._bus = bus
+        self._queued = []  # (addr, flags, buffer or None, start, length)
+        self._messages = []
+        self._request = None
+        self._read_length = 0
+        self.result = bytearray(0)
+
+    def write(self, addr, buf, start=0, end=None):
+        """Queue a write of buf[start:end] to the specified device."""
+        if end is None:
+            end = len(buf)
+        if isinstance(buf, bytes):
+            buf = bytearray(buf)
+        self._queued.append((addr, 0, buf, start, end - start))
+        self._request = None
+        return self
+
+    def read(self, addr, length):
+        """Queue a read of length bytes from the specified device and return
+        the offset of the data in ``result``.
+        """
+        offset = self._read_length
+        self._queued.append((addr, I2C_M_RD, None, offset, length))
+        self._read_length += length
+        self._request = None
+        return offset
+
+    def _build(self):
+        """Wrap every buffer with ctypes and build the ioctl data structure."""
+        self.result = bytearray(self._read_length)
+        messages = []
+        for addr, flags, buf, start, length in self._queued:
+            if buf is None:
+                buf = self.result
+            data = (c_uint8 * length).from_buffer(buf, start)
+            messages.append((addr, flags, length, cast(data, POINTER(c_uint8))))
+        self._request = make_i2c_rdwr_data(messages)
+        # Keep the ctypes pointers (and so the wrapped buffers) alive
+        self._messages = messages
+
+    def submit(self):
+        """Run all queued messages as one combined transaction and return the
+        ``result`` buffer.
+        """
+        if self._request is None:
+            self._build()
+        self._bus.transfer(self._request)
+        return self.result
+
+
 # Create an interface that mimics the Python SMBus API.
 class SMBus:
     """I2C interface that mimics the Python SMBus API but is implemented with
@@ -149,6 +211,17 @@ class SMBus:
             self._device.close()
             self._device = None
 
+    def transaction(self):
+        """Return a new `I2CTransaction` that batches messages on this bus."""
+        return I2CTransaction(self)
+
+    def transfer(self, request):
+        """Submit a prebuilt i2c_rdwr_ioctl_data request in one ioctl."""
+        assert (
+            self._device is not None
+        ), "Bus must be opened before operations are made against it!"
+        ioctl(self._device.fileno(), I2C_RDWR, request)
+
     def _select_device(self, addr):
         """Set the address of the device to communicate with on the I2C bus."""
         ioctl(self._device.fileno(), I2C_SLAVE, addr & 0x7F)
@@ -169,6 +242,61 @@ class SMBus:
         self._select_device(addr)
         return self._device.read(number)
 
+    def readinto(self, addr, buf, start=0, end=None):
+        """Read bytes from the specified device directly into buf[start:end].
+        buf must be a writable buffer (bytearray, memoryview, array...).  The
+        ioctl fills the caller's memory so no intermediate bytes are created.
+        """
+        assert (
+            self._device is not None
+        ), "Bus must be opened before operations are made against it!"
+        if end is None:
+            end = len(buf)
+        length = end - start
+        # Wrap the caller's memory in place, no copy.
+        result = (c_uint8 * length).from_buffer(buf, start)
+        # Build ioctl request.
+        request = make_i2c_rdwr_data(
+            [
+                (addr, I2C_M_RD, length, cast(result, POINTER(c_uint8))),
+            ]
+        )
+        ioctl(self._device.fileno(), I2C_RDWR, request)
+
+    # pylint: disable=too-many-arguments
+    def write_then_readinto(
+        self, addr, out_buf, in_buf, out_start=0, out_end=None, in_start=0, in_end=None
+    ):
+        """Write out_buf[out_start:out_end] to the specified device and then read
+        directly into in_buf[in_start:in_end] in one combined transaction (no
+        stop in between).  Writable output buffers are used in place, read-only
+        ones (bytes) are copied once.
+        """
+        assert (
+            self._device is not None
+        ), "Bus must be opened before operations are made against it!"
+        if out_end is None:
+            out_end = len(out_buf)
+        if in_end is None:
+            in_end = len(in_buf)
+        out_length = out_end - out_start
+        in_length = in_end - in_start
+        try:
+            cmd = (c_uint8 * out_length).from_buffer(out_buf, out_start)
+        except TypeError:
+            cmd = (c_uint8 * out_length).from_buffer_copy(out_buf, out_start)
+        result = (c_uint8 * in_length).from_buffer(in_buf, in_start)
+        # Build ioctl request.
+        request = make_i2c_rdwr_data(
+            [
+                (addr, 0, out_length, cast(cmd, POINTER(c_uint8))),  # Write data.
+                (addr, I2C_M_RD, in_length, cast(result, POINTER(c_uint8))),
+            ]
+        )
+        ioctl(self._device.fileno(), I2C_RDWR, request)
+
+    # pylint: enable=too-many-arguments
+
     def read_byte_data(self, addr, cmd):
         """Read a single byte from the specified cmd register of the device."""
         assert (
@@ -14,15 +14,17 @@ CircuitPython base class driver for ADS1015/1115 ADCs.
 __version__ = "2.4.2"
 __repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_ADS1x15.git"
 
+import sys
 import time
 
 from adafruit_bus_device.i2c_device import I2CDevice
 from micropython import const
 
 try:
-    from typing import Dict, List, Optional
+    from typing import Callable, Dict, List, Optional
 
     from busio import I2C
+    from circuitpython_typing import WriteableBuffer
     from microcontroller import Pin
 except ImportError:
     # define Pin to avoid the error:
@@ -328,6 +330,20 @@ class ADS1x15:
         if self.initialized:
             self._write_config()
 
+    def enable_conversion_ready(self) -> None:
+        """Use the ALERT/RDY pin as a conversion-ready signal.
+
+        Setting the high threshold MSB to 1 and the low threshold MSB to 0
+        makes the comparator pulse ALERT/RDY at the end of every conversion in
+        CONTINUOUS mode (see datasheet "Conversion Ready Pin"). The pulse is
+        active low unless `comparator_polarity` is ACTIVE_HIGH.
+        """
+        self.comparator_high_threshold = -32768
+        self.comparator_low_threshold = 0
+        self.comparator_latch = Comp_Latch.NONLATCHING
+        if self.comparator_queue_length == 0:
+            self.comparator_queue_length = 1
+
     def read(self, pin: Pin) -> int:
         """I2C Interface for ADS1x15-based ADCs reads.
 
@@ -390,6 +406,86 @@ class ADS1x15:
         """
         return self._read_register(_ADS1X15_POINTER_CONVERSION, fast)
 
+    def read_then_select(self, pin: Pin) -> int:
+        """Return the last conversion result and switch the MUX to ``pin``.
+
+        Both happen under a single bus lock, so a round-robin scan needs one
+        transaction per sample. In SINGLE mode the config write starts the
+        conversion of ``pin``, so its result is ready one conversion period
+        after this returns. In CONTINUOUS mode the conversion in progress
+        when the config is written still uses the previous input, so the
+        result for ``pin`` can take up to two conversion periods, the same
+        wait `read` uses when it switches inputs.
+
+        :param ~microcontroller.Pin pin: individual or differential pin to
+                          select for the next conversion.
+        """
+        config = self._config(pin)
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(
+                bytearray([_ADS1X15_POINTER_CONVERSION]), self.buf, in_end=2
+            )
+            raw_adc = self.buf[0] << 8 | self.buf[1]
+            self.buf[0] = _ADS1X15_POINTER_CONFIG
+            self.buf[1] = (config >> 8) & 0xFF
+            self.buf[2] = config & 0xFF
+            i2c.write(self.buf)
+        self._last_pin_read = pin
+        return self._conversion_value(raw_adc)
+
+    def read_block(
+        self,
+        n: int,
+        out: WriteableBuffer,
+        pin: Optional[Pin] = None,
+        wait: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Read ``n`` conversion results into ``out`` in CONTINUOUS mode.
+
+        After the first read sets the pointer register, every read is a fast
+        pointer-less read straight into the memory of ``out``. ``out`` must
+        hold at least ``n`` signed 16-bit items, e.g. an ``array('h')`` or an
+        int16 NumPy array. The bus is locked for each read only, not while
+        ``wait`` runs, so other devices on the bus can be used in between;
+        nothing else may access this ADC during the block, since that would
+        move its pointer register.
+
+        :param int n: number of results to read.
+        :param out: buffer receiving the signed results.
+        :param ~microcontroller.Pin pin: if given and different from the last
+                          pin read, the ADC is switched to it first.
+        :param wait: optional callable invoked before every read, e.g. to pace
+                          reads at the data rate. Defaults to back to back reads.
+        """
+        if self.mode != Mode.CONTINUOUS:
+            raise RuntimeError("Block reads require Mode.CONTINUOUS.")
+        if pin is not None and pin != self._last_pin_read:
+            self._read(pin)
+
+        raw = memoryview(out).cast("B")
+        end = 2 * n
+        if len(raw) < end:
+            raise ValueError("Output buffer too small for {} results.".format(n))
+
+        if wait is not None:
+            wait()
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(
+                bytearray([_ADS1X15_POINTER_CONVERSION]), raw, in_end=2
+            )
+        for start in range(2, end, 2):
+            if wait is not None:
+                wait()
+            with self.i2c_device as i2c:
+                i2c.readinto(raw, start=start, end=start + 2)
+
+        # Conversion register is big endian, swap in place for the host
+        if sys.byteorder == "little":
+            high = bytes(raw[0:end:2])
+            raw[0:end:2] = raw[1:end:2]
+            raw[1:end:2] = high
+        raw.release()
+
     def _write_register(self, reg: int, value: int):
         """Write 16 bit value to register."""
         self.buf[0] = reg
@@ -419,6 +515,13 @@ class ADS1x15:
                 self._read_register(_ADS1X15_POINTER_CONFIG) & 0x7000
             ) >> _ADS1X15_CONFIG_MUX_OFFSET
 
+        self._write_register(_ADS1X15_POINTER_CONFIG, self._config(pin_config))
+
+    def _config(self, pin_config: int) -> int:
+        """Build the configuration register value for the current settings
+
+        :param int pin_config: setting for MUX value in config register
+        """
         if self.mode == Mode.SINGLE:
             config = _ADS1X15_CONFIG_OS_SINGLE
         else:
@@ -432,7 +535,7 @@ class ADS1x15:
         config |= self.comparator_polarity
         config |= self.comparator_latch
         config |= _ADS1X15_CONFIG_COMP_QUEUE[self.comparator_queue_length]
-        self._write_register(_ADS1X15_POINTER_CONFIG, config)
+        return config
 
     def _read_config(self) -> None:
         """Reads Config Register and sets all properties accordingly"""
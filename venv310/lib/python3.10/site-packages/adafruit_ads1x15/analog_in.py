@@ -12,7 +12,8 @@ differential ADC readings.
 """
 
 try:
-    from typing import Optional
+    from typing import Callable, Optional
+    from circuitpython_typing import WriteableBuffer
     from .ads1x15 import ADS1x15
 except ImportError:
     pass
@@ -47,6 +48,11 @@ class AnalogIn:
             self._pin_setting = _ADS1X15_DIFF_CHANNELS[pins]
             self.is_differential = True
 
+    @property
+    def mux(self) -> int:
+        """The ADC MUX setting that selects this input. (read-only)"""
+        return self._pin_setting if self.is_differential else self._pin_setting + 0x04
+
     @property
     def value(self) -> int:
         """The value on the analog pin between 0 and 65535
@@ -55,8 +61,19 @@ class AnalogIn:
         Even if the underlying analog to digital converter (ADC) is
         lower resolution, the value is 16-bit.
         """
-        pin = self._pin_setting if self.is_differential else self._pin_setting + 0x04
-        return self._ads.read(pin)
+        return self._ads.read(self.mux)
+
+    def read_block(
+        self,
+        n: int,
+        out: WriteableBuffer,
+        wait: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Read ``n`` raw values from this pin into ``out`` with fast
+        pointer-less reads. The ADC must be in CONTINUOUS mode. See
+        `ADS1x15.read_block`.
+        """
+        self._ads.read_block(n, out, pin=self.mux, wait=wait)
 
     @property
     def voltage(self) -> float:
@@ -57,16 +57,17 @@ class I2C:
         """Write data from the buffer to an address"""
         if end is None:
             end = len(buffer)
-        self._i2c_bus.write_bytes(address, buffer[start:end])
+        if start != 0 or end != len(buffer):
+            # A memoryview slice avoids copying the data into a new bytes object
+            buffer = memoryview(buffer)[start:end]
+        self._i2c_bus.write_bytes(address, buffer)
 
     def readfrom_into(self, address, buffer, *, start=0, end=None, stop=True):
         """Read data from an address and into the buffer"""
         if end is None:
             end = len(buffer)
 
-        readin = self._i2c_bus.read_bytes(address, end - start)
-        for i in range(end - start):
-            buffer[i + start] = readin[i]
+        self._i2c_bus.readinto(address, buffer, start=start, end=end)
 
     # pylint: enable=unused-argument
 
@@ -94,9 +95,13 @@ class I2C:
             self.writeto(address, buffer_out, start=out_start, end=out_end, stop=True)
             self.readfrom_into(address, buffer_in, start=in_start, end=in_end)
         else:
-            # To generate without a stop, do in one block transaction
-            readin = self._i2c_bus.read_i2c_block_data(
-                address, buffer_out[out_start:out_end], in_end - in_start
+            # To generate without a stop, do in one combined transaction
+            self._i2c_bus.write_then_readinto(
+                address,
+                buffer_out,
+                buffer_in,
+                out_start=out_start,
+                out_end=out_end,
+                in_start=in_start,
+                in_end=in_end,
             )
-            for i in range(in_end - in_start):
-                buffer_in[i + in_start] = readin[i]
@@ -0,0 +1,108 @@
+"""Chirp-Z zoom around a coarse pitch for tuner resolution.
+
+An N point FFT at 860 sps has bins 1.7 Hz apart, which is 25 cents at
+110 Hz.  Instead of a longer window, the chirp-Z transform evaluates the
+same frame's spectrum on POINTS frequencies spread over one semitone either
+side of the nearest note.  It is computed with Bluestein's algorithm (two
+FFTs and one inverse of a small power-of-two length) and everything that
+depends only on the frame length, rate and note is cached.
+"""
+from collections import OrderedDict
+import numpy as np
+from notes import freq_to_midi, midi_to_freq, note_name
+from spectrum import RATE_STEP
+
+POINTS = 128           # zoom frequencies over the +-1 semitone band
+MAX_ZOOMS = 32
+
+
+class ZoomPlan:
+    """Chirp-Z transform of SAMPLES points at RATE sps around MIDI note NOTE.
+
+    freqs and cents give the evaluated frequencies and their offset from
+    the note; run() returns the magnitudes at those frequencies.
+    """
+
+    def __init__(self, samples, rate, note, points=POINTS):
+        self.samples = samples
+        self.rate = rate
+        self.note = note
+        self.name = note_name(note)
+        self.cents = np.linspace(-100, 100, points)
+        self.freqs = midi_to_freq(note + self.cents / 100)
+
+        # The cents grid is not linear in Hz; the CZT grid is, so evaluate
+        # linearly between the band edges and interpolate onto cents later
+        start, stop = self.freqs[0], self.freqs[-1]
+        self.grid = np.linspace(start, stop, points)
+        step = (stop - start) / (points - 1)
+
+        n = np.arange(samples)
+        k = np.arange(points)
+        size = 1 << int(np.ceil(np.log2(samples + points - 1)))
+        self._size = size
+        # x[n] * A^-n * W^(n^2/2) with A = e^(j 2 pi start/rate), W = e^(-j 2 pi step/rate)
+        self._pre = np.exp(-2j * np.pi * (start * n + 0.5 * step * n * n) / rate)
+        self._post = np.exp(-1j * np.pi * step * k * k / rate)
+        # Chirp kernel W^(-m^2/2) for -(samples-1) <= m <= points-1, wrapped
+        chirp = np.zeros(size, dtype=complex)
+        m = np.arange(max(samples, points))
+        kernel = np.exp(1j * np.pi * step * m * m / rate)
+        chirp[:points] = kernel[:points]
+        chirp[size - samples + 1:] = kernel[1:samples][::-1]
+        self._chirp = np.fft.fft(chirp)
+        self._work = np.zeros(size, dtype=complex)
+        self.magnitude = np.zeros(points)
+
+    def run(self, frame):
+        """Magnitudes of an already windowed frame at the zoom frequencies."""
+        work = self._work
+        work[:] = 0
+        np.multiply(frame, self._pre, out=work[:self.samples])
+        spec = np.fft.ifft(np.fft.fft(work) * self._chirp)[:len(self.grid)]
+        linear = np.abs(spec * self._post)
+        self.magnitude[:] = np.interp(self.freqs, self.grid, linear)
+        return self.magnitude
+
+    def peak(self, frame):
+        """Refined frequency and cents offset of the largest zoom value."""
+        mags = self.run(frame)
+        i = int(np.argmax(mags))
+        cents = self.cents[i]
+        if 0 < i < len(mags) - 1:
+            a, b, c = np.log(mags[i - 1:i + 2] + np.finfo(float).tiny)
+            denom = a - 2 * b + c
+            if denom:
+                cents += 0.5 * (a - c) / denom * (self.cents[1] - self.cents[0])
+        return float(midi_to_freq(self.note + cents / 100)), float(cents)
+
+
+_zooms = OrderedDict()
+
+
+def zoom_for(samples, rate, freq, points=POINTS):
+    """Return the cached ZoomPlan for the note nearest to freq."""
+    rate = round(rate / RATE_STEP) * RATE_STEP
+    note = int(round(float(freq_to_midi(freq))))
+    key = (samples, rate, note, points)
+    plan = _zooms.get(key)
+    if plan is None:
+        plan = _zooms[key] = ZoomPlan(samples, rate, note, points)
+        if len(_zooms) > MAX_ZOOMS:
+            _zooms.popitem(last=False)
+    else:
+        _zooms.move_to_end(key)
+    return plan
+
+
+def zoom_peak(plan, coarse_freq, points=POINTS):
+    """Refine coarse_freq from the frame an FFT plan has just run on.
+
+    Returns (frequency, nearest note name, cents off that note); the frame
+    is the plan's zero-centred, windowed buffer so no data is copied again.
+    """
+    if coarse_freq <= 0:
+        return 0.0, None, 0.0
+    zoom = zoom_for(plan.samples, plan.rate, coarse_freq, points)
+    freq, cents = zoom.peak(plan.frame)
+    return freq, zoom.name, cents